@@ -16,43 +16,35 @@ sys.path.insert(0, str(current_dir))
 # Load environment variables from .env if present
 load_dotenv(dotenv_path=current_dir / ".env", override=False)
 
-from fastapi import FastAPI, Body
+from fastapi import FastAPI, Body, Header, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from openai import OpenAI
+import asyncio
 import uuid
 import json
 import re
+import hmac
+import math
 from typing import Optional
 
 # Import all the field definitions and prompts using absolute imports
 from constants import *
-from models import ChatRequest, GPTSelectionRequest, OfferToAvatarHandoffRequest, OfferToAvatarHandoffResponse, AvatarToBeforeHandoffRequest, AvatarToAfterHandoffRequest
+from models import ChatRequest, GPTSelectionRequest, HealthResponse, OfferToAvatarHandoffRequest, OfferToAvatarHandoffResponse, AvatarToBeforeHandoffRequest, AvatarToAfterHandoffRequest
 from services import GPTService
+from session_store import SessionConflictError
+from ratelimit import RateLimitExceeded
+from deadline import DeadlineExceeded
+import settings
 
-# Initialize OpenAI client (ensure API key is available)
+# Ensure the OpenAI API key is available; GPTService owns the (only) OpenAI client
 openai_api_key = os.getenv("OPENAI_API_KEY")
 if not openai_api_key:
     raise RuntimeError(
         "OPENAI_API_KEY is not set. Please set it in your Hugging Face Space environment variables."
     )
 
-# Initialize OpenAI client with explicit httpx configuration
-try:
-    import httpx
-    client = OpenAI(
-        api_key=openai_api_key,
-        http_client=httpx.Client(
-            timeout=httpx.Timeout(30.0, connect=10.0),
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
-        )
-    )
-except Exception as e:
-    # Fallback to basic initialization if httpx configuration fails
-    client = OpenAI(api_key=openai_api_key)
-
 app = FastAPI(
     title="EUREKA GPT Assistant Suite", 
     description="Complete suite of 13 specialized GPT assistants for marketing strategy",
@@ -71,48 +63,178 @@ app.add_middleware(
 # Initialize GPT service
 gpt_service = GPTService()
 
+@app.on_event("startup")
+async def startup():
+    """Start evicting expired sessions in the background"""
+    gpt_service.sweeper.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Flush pending session writes before the process exits"""
+    await gpt_service.close()
+
+@app.exception_handler(SessionConflictError)
+async def session_conflict(request, exc: SessionConflictError):
+    """Another worker saved the session during this turn; the client should retry"""
+    return JSONResponse(status_code=409, content={"error": str(exc), "session_id": exc.session_id})
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limited(request, exc: RateLimitExceeded):
+    """The OpenAI quota is exhausted for longer than calls may queue; the client should back off"""
+    retry_after = math.ceil(exc.retry_after)
+    return JSONResponse(
+        status_code=429,
+        content={"error": str(exc), "retry_after": retry_after},
+        headers={"Retry-After": str(retry_after)}
+    )
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded(request, exc: DeadlineExceeded):
+    """The turn ran past CHAT_DEADLINE_SECONDS and was cancelled; the session is unchanged"""
+    return JSONResponse(status_code=504, content={"error": str(exc)})
+
+# Status for requests whose client went away before the answer (nginx convention)
+CLIENT_CLOSED_REQUEST = 499
+
+async def wait_for_disconnect(request: Request) -> None:
+    """Return once the client has closed the connection"""
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+async def unless_disconnected(request: Request, awaitable):
+    """Await ``awaitable``, cancelling it if the client disconnects first.
+
+    Returns its result, or a 499 response when the client went away.
+    """
+    work = asyncio.ensure_future(awaitable)
+    disconnect = asyncio.ensure_future(wait_for_disconnect(request))
+    try:
+        await asyncio.wait({work, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect.cancel()
+    if not work.done():
+        work.cancel()
+        try:
+            await work
+        except asyncio.CancelledError:
+            pass
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    return work.result()
+
 @app.post("/api/select-gpt")
-def select_gpt(req: GPTSelectionRequest):
+async def select_gpt(req: GPTSelectionRequest):
     """Select which GPT to use for the session"""
-    return gpt_service.select_gpt(req.gpt_type)
+    return await gpt_service.select_gpt(req.gpt_type)
 
 @app.post("/api/chat")
-def chat(req: ChatRequest):
-    """Handle chat messages with the selected GPT"""
-    return gpt_service.chat(req)
+async def chat(req: ChatRequest, request: Request):
+    """Handle chat messages with the selected GPT; the turn is cancelled if the client disconnects"""
+    return await unless_disconnected(request, gpt_service.chat(req))
+
+@app.post("/api/chat/stream")
+async def chat_stream(req: ChatRequest, request: Request):
+    """Stream the reply to a chat message as Server-Sent Events"""
+    stream = gpt_service.chat_stream(req)
+    # Wait for the first event before answering, so a turn refused by admission control
+    # or past its deadline still gets a proper status code
+    first = await unless_disconnected(request, anext(stream, None))
+    if isinstance(first, Response):
+        return first
+
+    async def events():
+        # Once streaming, StreamingResponse stops iterating when the client disconnects
+        try:
+            if first is not None:
+                yield first
+            async for event in stream:
+                yield event
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/sessions/{session_id}/fields")
+async def get_fields(session_id: str, since: Optional[int] = None, wait: float = 0):
+    """Get extracted fields; with `since`, wait up to `wait` seconds for a newer version"""
+    return await gpt_service.get_fields(session_id, since=since, wait=min(wait, 30.0))
 
 @app.post("/api/reset")
-def reset_session(session_id: str = Body(...)):
+async def reset_session(session_id: str = Body(...)):
     """Reset a conversation session"""
-    return gpt_service.reset_session(session_id)
+    return await gpt_service.reset_session(session_id)
 
 @app.post("/api/combined-summary")
-def get_combined_summary(session_ids: list = Body(...)):
+async def get_combined_summary(session_ids: list = Body(...)):
     """Generate a combined summary from multiple GPT sessions"""
-    return gpt_service.get_combined_summary(session_ids)
+    return await gpt_service.get_combined_summary(session_ids)
+
+@app.get("/api/usage")
+async def get_usage():
+    """Token usage totals per GPT type and call role"""
+    return gpt_service.get_usage()
+
+@app.get("/api/health", response_model=HealthResponse)
+async def health_check():
+    """Liveness probe: the process is up and serving; touches no store or upstream"""
+    return {"status": "healthy"}
+
+@app.get("/api/ready")
+async def readiness_check():
+    """Readiness probe with capacity details; 503 while the node is overloaded"""
+    report = await gpt_service.get_readiness()
+    return JSONResponse(status_code=503 if report["status"] != "ready" else 200, content=report)
+
+
+def admin_denied(token: Optional[str]) -> Optional[JSONResponse]:
+    """Error response unless the request carries the configured admin token"""
+    if not settings.ADMIN_TOKEN:
+        return JSONResponse(status_code=403, content={"error": "Admin endpoints are disabled; set ADMIN_TOKEN"})
+    if not token or not hmac.compare_digest(token, settings.ADMIN_TOKEN):
+        return JSONResponse(status_code=401, content={"error": "Invalid admin token"})
+    return None
+
+@app.get("/api/admin/sessions/export")
+async def export_sessions(x_admin_token: Optional[str] = Header(None)):
+    """Stream all sessions as a compressed binary snapshot"""
+    denied = admin_denied(x_admin_token)
+    if denied:
+        return denied
+    return StreamingResponse(
+        gpt_service.export_sessions(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": 'attachment; filename="sessions.ekss"'}
+    )
 
-@app.get("/api/health")
-def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "sessions": gpt_service.get_session_count()}
+@app.post("/api/admin/sessions/import")
+async def import_sessions(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Bulk-load sessions from a snapshot streamed in the request body"""
+    denied = admin_denied(x_admin_token)
+    if denied:
+        return denied
+    result = await gpt_service.import_sessions(request.stream())
+    return JSONResponse(status_code=400, content=result) if "error" in result else result
 
 
 @app.post("/api/handoff/offer-to-avatar", response_model=OfferToAvatarHandoffResponse)
-def handoff_offer_to_avatar(req: OfferToAvatarHandoffRequest):
+async def handoff_offer_to_avatar(req: OfferToAvatarHandoffRequest):
     """Create an Avatar Creator session prefilled from an Offer Clarifier session"""
-    return gpt_service.handoff_offer_to_avatar(req.offer_session_id)
+    return await gpt_service.handoff_offer_to_avatar(req.offer_session_id)
 
 
 @app.post("/api/handoff/avatar-to-before")
-def handoff_avatar_to_before(req: AvatarToBeforeHandoffRequest):
+async def handoff_avatar_to_before(req: AvatarToBeforeHandoffRequest):
     """Create a Before State Research session with avatar context"""
-    return gpt_service.handoff_avatar_to_before(req.avatar_session_id)
+    return await gpt_service.handoff_avatar_to_before(req.avatar_session_id)
 
 
 @app.post("/api/handoff/avatar-to-after")
-def handoff_avatar_to_after(req: AvatarToAfterHandoffRequest):
+async def handoff_avatar_to_after(req: AvatarToAfterHandoffRequest):
     """Create an After State Research session with avatar context"""
-    return gpt_service.handoff_avatar_to_after(req.avatar_session_id)
+    return await gpt_service.handoff_avatar_to_after(req.avatar_session_id)
 
 @app.get("/")
 async def serve_frontend():
@@ -148,9 +270,13 @@ async def serve_frontend():
                     <h3>📡 API Endpoints Available:</h3>
                     <div class="endpoint">POST /api/select-gpt - Select which GPT to use</div>
                     <div class="endpoint">POST /api/chat - Chat with the selected GPT</div>
+                    <div class="endpoint">POST /api/chat/stream - Chat with streamed (SSE) replies</div>
+                    <div class="endpoint">GET /api/sessions/{session_id}/fields - Extracted fields and version</div>
                     <div class="endpoint">POST /api/reset - Reset a conversation session</div>
                     <div class="endpoint">POST /api/combined-summary - Get combined summary from multiple sessions</div>
-                    <div class="endpoint">GET /api/health - Health check</div>
+                    <div class="endpoint">GET /api/usage - Token usage per GPT type</div>
+                    <div class="endpoint">GET /api/health - Liveness probe</div>
+                    <div class="endpoint">GET /api/ready - Readiness probe with capacity details</div>
                 </div>
                 
                 <div class="docs-link">
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for in-process sessions.
+
+Builds N sessions spread over all GPT types, each with a few chat turns, and
+reports the bytes allocated per session for the slotted Session objects and,
+for comparison, for the plain-dict layout they replaced.
+
+    python bench_sessions.py --sessions 100000 --turns 4
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from constants import GPT_CONFIGS
+from prompts import GPT_PROMPTS
+from session import Session
+from usage import empty_usage
+
+
+def build_dict_session(gpt_type: str):
+    """The plain-dict session layout, with its own system message"""
+    return {
+        "gpt_type": gpt_type,
+        "messages": [{"role": "system", "content": GPT_PROMPTS.get(gpt_type, GPT_PROMPTS["offer_clarifier"])}],
+        "fields": {field: None for field in GPT_CONFIGS[gpt_type]["fields"]},
+        "fields_version": 0,
+        "summary": None,
+        "history_offset": 0,
+        "version": 0,
+        "usage": empty_usage(),
+        "current_question": 0
+    }
+
+
+def build_slotted_session(gpt_type: str):
+    return Session(gpt_type, GPT_PROMPTS.get(gpt_type, GPT_PROMPTS["offer_clarifier"]), GPT_CONFIGS[gpt_type]["fields"])
+
+
+def measure(build, count: int, turns: int) -> dict:
+    """Allocate ``count`` sessions with ``turns`` exchanges each and measure them"""
+    gpt_types = list(GPT_CONFIGS)
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    sessions = {}
+    for i in range(count):
+        session = build(gpt_types[i % len(gpt_types)])
+        for turn in range(turns):
+            # Distinct strings per message, as real user input and replies would be
+            session["messages"].append({"role": "user", "content": f"Answer {turn} from user {i}"})
+            session["messages"].append({"role": "assistant", "content": f"Follow-up question {turn} for user {i}"})
+        sessions[f"session-{i}"] = session
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions
+    return {"bytes": current, "per_session": current / count, "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100000, help="number of sessions to build")
+    parser.add_argument("--turns", type=int, default=4, help="user/assistant exchanges per session")
+    args = parser.parse_args()
+
+    print(f"🧪 {args.sessions} sessions, {args.turns} turns each")
+    results = {}
+    for name, build in (("dict", build_dict_session), ("slotted", build_slotted_session)):
+        results[name] = measure(build, args.sessions, args.turns)
+        r = results[name]
+        print(f"{name:>8}: {r['bytes'] / 2**20:8.1f} MiB total, {r['per_session']:8.0f} bytes/session, built in {r['seconds']:.2f}s")
+
+    saved = 1 - results["slotted"]["per_session"] / results["dict"]["per_session"]
+    print(f"✅ slotted sessions use {saved:.0%} less memory per session")
+
+
+if __name__ == "__main__":
+    main()
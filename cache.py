@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+
+class CompletionCache:
+    """Content-hashed LRU + TTL cache for deterministic completions.
+
+    Entries are keyed by a hash of the full request (model, messages, tools,
+    temperature, ...). When ``persist_dir`` is set, entries are also written to
+    disk so they survive restarts; an entry's file is removed when the entry
+    expires or is evicted, and expired files are pruned at startup.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, persist_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_dir = persist_dir
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+            self._prune()
+
+    @staticmethod
+    def key_for(request: Dict[str, Any]) -> str:
+        """Stable content hash of a completion request"""
+        payload = json.dumps(request, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for ``key``, or None on a miss"""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            self.expirations += 1
+
+        if self.persist_dir:
+            stored = await asyncio.to_thread(self._read, key)
+            if stored is not None and stored["expires_at"] > now:
+                await self._discard(self._store(key, stored["expires_at"], stored["value"]))
+                self.hits += 1
+                self.disk_hits += 1
+                return stored["value"]
+            if stored is not None or entry is not None:
+                # Expired: drop its file as well
+                await self._discard([key])
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Cache a response for ``key``"""
+        expires_at = time.time() + self.ttl_seconds
+        evicted = self._store(key, expires_at, value)
+        if self.persist_dir:
+            await asyncio.to_thread(self._write, key, expires_at, value)
+            await self._discard(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _store(self, key: str, expires_at: float, value: Dict[str, Any]) -> List[str]:
+        """Add an entry; returns the keys evicted to make room"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            evicted.append(self._entries.popitem(last=False)[0])
+            self.evictions += 1
+        return evicted
+
+    async def _discard(self, keys: List[str]) -> None:
+        """Remove the files of entries that are no longer cached"""
+        keys = [key for key in keys if key not in self._entries]
+        if self.persist_dir and keys:
+            await asyncio.to_thread(self._remove, keys)
+
+    def _prune(self) -> None:
+        """Remove files an earlier run left behind that have expired since"""
+        cutoff = time.time() - self.ttl_seconds
+        with os.scandir(self.persist_dir) as entries:
+            for entry in entries:
+                try:
+                    expired = entry.name.endswith((".json", ".tmp")) and entry.stat().st_mtime < cutoff
+                except OSError:
+                    continue
+                if expired:
+                    self._remove_file(entry.path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.persist_dir, f"{key}.json")
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key: str, expires_at: float, value: Dict[str, Any]) -> None:
+        # Write to a temp file of its own, then rename, so readers never see a
+        # partial file and concurrent writers of one key don't interleave
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.persist_dir, suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                json.dump({"expires_at": expires_at, "value": value}, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if tmp_path:
+                self._remove_file(tmp_path)
+
+    def _remove(self, keys: List[str]) -> None:
+        for key in keys:
+            self._remove_file(self._path(key))
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
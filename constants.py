@@ -186,70 +186,299 @@ IDEA_INJECTION_BOT_FIELDS = [
     "synthesizer_handoff"
 ]
 
+# Field descriptions used to build the structured extraction schema for each GPT
+OFFER_CLARIFIER_FIELD_DESCRIPTIONS = {
+    "product_name": "The name of the product/service/offer",
+    "core_transformation": "The main outcome or transformation customers get",
+    "features": "Key features or deliverables",
+    "delivery_method": "How it's delivered (live, digital, coaching, etc.)",
+    "format": "What format it's in (course, membership, service, SaaS, etc.)",
+    "pricing": "Price or pricing model",
+    "unique_value": "What makes it different/unique (USP)",
+    "target_audience": "Who it's for/ideal customer",
+    "problems_solved": "Problems it solves"
+}
+
+AVATAR_CREATOR_FIELD_DESCRIPTIONS = {
+    "customer_segment": "Who is their ideal customer",
+    "avatar_name": "The name given to the avatar",
+    "demographics": "Age, job, income, location, family, lifestyle details",
+    "frustrations_fears": "Problems they face, what keeps them up at night",
+    "wants_aspirations": "Dreams, goals, what they're working toward, values",
+    "purchase_drivers": "What makes them say yes, what they value most",
+    "objections": "What might stop them from buying, concerns, hesitations",
+    "decision_making": "How they make decisions, who influences them",
+    "before_state": "Life before the solution, how they feel, struggles",
+    "after_state": "Life after using the solution, improvements, new feelings",
+    "emotional_shift": "Emotional transformation from negative to positive"
+}
+
+BEFORE_STATE_RESEARCH_FIELD_DESCRIPTIONS = {
+    "avatar_input": "The original customer avatar data provided",
+    "what_they_have": "What unwanted or frustrating things they have in their life right now",
+    "how_they_feel": "How they feel emotionally - frustrated, overwhelmed, lost, anxious, etc.",
+    "average_day": "What their typical day looks like and where struggles show up",
+    "status": "How they feel about themselves or how others see them",
+    "evil_they_face": "What they think is the cause of the problem or root cause they're fighting",
+    "research_communities": "Online communities where people talk about this situation",
+    "emotional_patterns": "Patterns in emotions and struggles found in research",
+    "before_state_narrative": "Complete before state story in narrative format",
+    "empathy_map": "Empathy map summary of their before state"
+}
+
+AFTER_STATE_RESEARCH_FIELD_DESCRIPTIONS = {
+    "avatar_input": "The customer avatar (with before state) provided by the user",
+    "what_they_have_now": "What they have in their life after the transformation",
+    "how_they_feel_now": "How they feel emotionally after the transformation",
+    "average_day_now": "What their typical day looks like after the transformation",
+    "status_now": "How they see themselves and how others see them now",
+    "good_they_do": "The good they are now able to do for themselves and others",
+    "research_communities": "Online communities where people describe this success state",
+    "transformation_language": "Words and phrases people use to describe the transformation",
+    "after_state_narrative": "Complete after state story in narrative format",
+    "success_stories": "Success stories or examples that illustrate the after state"
+}
+
+AVATAR_VALIDATOR_FIELD_DESCRIPTIONS = {
+    "avatar_profile_input": "The completed customer avatar profile provided for validation",
+    "demographics_analysis": "Assessment of the demographics section",
+    "frustrations_analysis": "Assessment of the frustrations and fears section",
+    "wants_analysis": "Assessment of the wants and aspirations section",
+    "purchase_drivers_analysis": "Assessment of the purchase drivers section",
+    "before_state_analysis": "Assessment of the before state section",
+    "after_state_analysis": "Assessment of the after state section",
+    "logic_conflicts": "Conflicting or contradictory information found in the avatar",
+    "missing_areas": "Areas of the avatar that are missing or too vague",
+    "improvement_suggestions": "Specific suggestions to improve the avatar",
+    "validated_avatar": "The final validated avatar ready for marketing use"
+}
+
+TRIGGER_GPT_FIELD_DESCRIPTIONS = {
+    "avatar_input": "The customer avatar provided by the user",
+    "internal_triggers": "Internal (emotional or personal) triggering events",
+    "external_triggers": "External (situational or market) triggering events",
+    "seasonal_triggers": "Seasonal or time-based triggering events",
+    "trigger_moments": "Specific moments that shift the customer to seek a solution now",
+    "emotional_states": "Emotional states the customer is in at each trigger",
+    "content_ideas": "Content ideas mapped to the triggers",
+    "entry_point_offers": "Entry point offers suggested for the triggers",
+    "trigger_narratives": "Short narratives describing each trigger moment",
+    "urgency_factors": "What creates urgency for the customer at each trigger",
+    "predictability_ranking": "Triggers ranked by how predictable they are"
+}
+
+EPO_BUILDER_FIELD_DESCRIPTIONS = {
+    "avatar_input": "The customer avatar provided by the user",
+    "triggers_input": "The triggering events provided by the user",
+    "headlines_input": "The headlines provided by the user",
+    "offer_type_analysis": "Analysis of which entry point offer types fit best",
+    "gated_content_offers": "Gated content offer ideas (lead magnets)",
+    "loss_leader_offers": "Loss leader offer ideas",
+    "product_preview_offers": "Product preview offer ideas",
+    "trial_upgrade_offers": "Trial or upgrade offer ideas",
+    "velvet_rope_offers": "Velvet rope (exclusive access) offer ideas",
+    "recommended_offers": "The recommended entry point offers",
+    "micro_commitments": "Micro-commitment strategies that move prospects forward",
+    "implementation_format": "How the recommended offers will be delivered"
+}
+
+SCAMPER_SYNTHESIZER_FIELD_DESCRIPTIONS = {
+    "existing_concept_input": "The existing offer, campaign or strategy provided",
+    "customer_avatar_input": "The customer avatar provided by the user",
+    "cvj_stage_focus": "The Customer Value Journey stage to focus on",
+    "substitute_ideas": "Ideas from the Substitute lens",
+    "combine_ideas": "Ideas from the Combine lens",
+    "adapt_ideas": "Ideas from the Adapt lens",
+    "modify_magnify_ideas": "Ideas from the Modify/Magnify lens",
+    "put_to_another_use_ideas": "Ideas from the Put to Another Use lens",
+    "eliminate_ideas": "Ideas from the Eliminate lens",
+    "reverse_rearrange_ideas": "Ideas from the Reverse/Rearrange lens",
+    "selected_innovations": "The innovations the user selected",
+    "implementation_strategy": "How the selected innovations will be implemented"
+}
+
+WILDCARD_IDEA_BOT_FIELD_DESCRIPTIONS = {
+    "product_service_input": "The product or service description provided",
+    "customer_avatar_input": "The customer avatar provided by the user",
+    "campaign_ideas_input": "Early-stage campaign ideas or hooks provided",
+    "wildcard_idea_1": "First wildcard idea",
+    "wildcard_idea_2": "Second wildcard idea",
+    "wildcard_idea_3": "Third wildcard idea",
+    "wildcard_idea_4": "Fourth wildcard idea",
+    "wildcard_idea_5": "Fifth wildcard idea",
+    "cvj_stage_mapping": "Which Customer Value Journey stage each idea maps to",
+    "audience_considerations": "Audience considerations for the wildcard ideas",
+    "selected_wildcards": "The wildcard ideas the user selected",
+    "implementation_warnings": "Risks or warnings to consider when implementing"
+}
+
+CONCEPT_CRAFTER_FIELD_DESCRIPTIONS = {
+    "product_service_input": "The product or service description provided",
+    "customer_avatar_input": "The customer avatar provided by the user",
+    "business_goals_input": "The business goals provided by the user",
+    "main_hook_headline": "The main hook or headline",
+    "positioning_one_liners": "Positioning one-liner statements",
+    "value_proposition_paragraph": "The value proposition paragraph",
+    "tagline_ideas": "Tagline ideas",
+    "voice_tone_recommendations": "Recommended brand voice and tone",
+    "style_tips": "Style tips for the messaging",
+    "messaging_angles": "Messaging angles to test",
+    "emotional_triggers": "Emotional triggers the messaging uses",
+    "competitive_differentiation": "How the messaging differentiates from competitors"
+}
+
+HOOK_HEADLINE_GPT_FIELD_DESCRIPTIONS = {
+    "avatar_document_input": "The avatar document provided (pain, desire, before/after states)",
+    "concept_crafter_input": "The Concept Crafter output provided",
+    "trigger_events_input": "The trigger events provided",
+    "cvj_stage_focus": "The Customer Value Journey stage to focus on",
+    "concept_1_hooks": "Hooks and headlines for the first concept",
+    "concept_2_hooks": "Hooks and headlines for the second concept",
+    "concept_3_hooks": "Hooks and headlines for the third concept",
+    "email_sms_subject_lines": "Email and SMS subject lines",
+    "content_angles": "Content angles for the hooks",
+    "pain_vs_aspiration_hooks": "Pain-based versus aspiration-based hooks",
+    "cvj_mapped_messaging": "Messaging mapped to Customer Value Journey stages",
+    "selected_hooks_headlines": "The hooks and headlines the user selected"
+}
+
+CAMPAIGN_CONCEPT_GENERATOR_FIELD_DESCRIPTIONS = {
+    "avatar_input": "The validated avatar provided by the user",
+    "trigger_gpt_output": "The TriggerGPT output provided",
+    "concept_crafter_output": "The Concept Crafter output provided",
+    "hooks_headlines_output": "The Hooks & Headlines output provided",
+    "funnel_strategy_map": "The funnel strategy map provided",
+    "offer_stack_epos": "The offer stack and entry point offers",
+    "campaign_1_concept": "First campaign concept",
+    "campaign_2_concept": "Second campaign concept",
+    "campaign_3_concept": "Third campaign concept",
+    "campaign_titles": "Titles for the campaign concepts",
+    "core_hooks_emotions": "Core hooks and emotions of the campaigns",
+    "funnel_strategies": "Funnel strategies for the campaigns",
+    "selected_campaign": "The campaign the user selected"
+}
+
+IDEA_INJECTION_BOT_FIELD_DESCRIPTIONS = {
+    "user_idea_input": "The idea as the user shared it",
+    "idea_description": "A clear description of the idea",
+    "idea_tags": "Tags that classify the idea",
+    "connection_areas": "Which areas or GPTs the idea connects to",
+    "user_commentary": "Any extra commentary from the user",
+    "timestamp": "When the idea was captured, if stated",
+    "idea_category": "The category of the idea",
+    "implementation_notes": "Notes on how to implement the idea",
+    "priority_level": "How important or urgent the idea is",
+    "related_gpts": "GPTs that should use the idea",
+    "stored_ideas": "Ideas stored so far in the session",
+    "synthesizer_handoff": "What to hand off to the SCAMPER Synthesizer"
+}
+
+# Fields extracted as arrays of strings rather than free text
+LIST_FIELDS = {
+    "features",
+    "problems_solved",
+    "positioning_one_liners",
+    "tagline_ideas",
+    "email_sms_subject_lines",
+    "campaign_titles",
+    "idea_tags",
+    "related_gpts"
+}
+
+# Conversation history budget (prompt tokens) sent upstream per turn; a GPT config
+# may override it with "history_token_budget"
+DEFAULT_HISTORY_TOKEN_BUDGET = 6000
+# Messages kept verbatim when older turns are folded into the rolling summary
+HISTORY_RECENT_MESSAGES = 6
+# Fraction of the budget at which background compaction kicks in
+HISTORY_COMPACTION_THRESHOLD = 0.75
+
+# Model used for each upstream call role. A GPT config may override individual
+# roles with a "models" mapping, e.g. {"extraction": "gpt-4"}
+DEFAULT_MODEL_ROUTES = {
+    "reply": "gpt-4",           # creative conversational reply
+    "proceed": "gpt-4o-mini",   # "ask the next question" nudge
+    "extraction": "gpt-4o-mini",  # structured field extraction
+    "summary": "gpt-4o-mini"    # rolling history summary
+}
+
 # GPT Configuration mapping
 GPT_CONFIGS = {
     "offer_clarifier": {
         "fields": OFFER_CLARIFIER_FIELDS,
+        "field_descriptions": OFFER_CLARIFIER_FIELD_DESCRIPTIONS,
         "name": "Offer Clarifier",
         "description": "Define your product or service clearly through 9 key questions"
     },
     "avatar_creator": {
         "fields": AVATAR_CREATOR_FIELDS,
+        "field_descriptions": AVATAR_CREATOR_FIELD_DESCRIPTIONS,
         "name": "Avatar Creator & Empathy Map",
         "description": "Build a complete customer avatar using the DigitalMarketer framework"
     },
     "before_state_research": {
         "fields": BEFORE_STATE_RESEARCH_FIELDS,
+        "field_descriptions": BEFORE_STATE_RESEARCH_FIELD_DESCRIPTIONS,
         "name": "Before State Research",
         "description": "Uncover deep emotional and psychological insights about your avatar's struggles"
     },
     "after_state_research": {
         "fields": AFTER_STATE_RESEARCH_FIELDS,
+        "field_descriptions": AFTER_STATE_RESEARCH_FIELD_DESCRIPTIONS,
         "name": "After State Research",
         "description": "Create compelling transformation narratives for your avatar's success state"
     },
     "avatar_validator": {
         "fields": AVATAR_VALIDATOR_FIELDS,
+        "field_descriptions": AVATAR_VALIDATOR_FIELD_DESCRIPTIONS,
         "name": "Avatar Validator",
         "description": "Analyze and improve your customer avatar for marketing readiness"
     },
     "trigger_gpt": {
         "fields": TRIGGER_GPT_FIELDS,
+        "field_descriptions": TRIGGER_GPT_FIELD_DESCRIPTIONS,
         "name": "Trigger GPT",
         "description": "Identify what events trigger your customers to seek solutions"
     },
     "epo_builder": {
         "fields": EPO_BUILDER_FIELDS,
+        "field_descriptions": EPO_BUILDER_FIELD_DESCRIPTIONS,
         "name": "EPO Builder",
         "description": "Generate compelling Entry Point Offers for your customer journey"
     },
     "scamper_synthesizer": {
         "fields": SCAMPER_SYNTHESIZER_FIELDS,
+        "field_descriptions": SCAMPER_SYNTHESIZER_FIELD_DESCRIPTIONS,
         "name": "SCAMPER Synthesizer",
         "description": "Innovate your existing concepts using the SCAMPER framework"
     },
     "wildcard_idea_bot": {
         "fields": WILDCARD_IDEA_BOT_FIELDS,
+        "field_descriptions": WILDCARD_IDEA_BOT_FIELD_DESCRIPTIONS,
         "name": "Wildcard Idea Bot",
         "description": "Inject bold, unexpected creative ideas to break marketing predictability"
     },
     "concept_crafter": {
         "fields": CONCEPT_CRAFTER_FIELDS,
+        "field_descriptions": CONCEPT_CRAFTER_FIELD_DESCRIPTIONS,
         "name": "Concept Crafter Bot",
         "description": "Transform your offerings into compelling positioning and messaging"
     },
     "hook_headline_gpt": {
         "fields": HOOK_HEADLINE_GPT_FIELDS,
+        "field_descriptions": HOOK_HEADLINE_GPT_FIELD_DESCRIPTIONS,
         "name": "Hook & Headline GPT",
         "description": "Generate scroll-stopping, emotion-driven messaging for all platforms"
     },
     "campaign_concept_generator": {
         "fields": CAMPAIGN_CONCEPT_GENERATOR_FIELDS,
+        "field_descriptions": CAMPAIGN_CONCEPT_GENERATOR_FIELD_DESCRIPTIONS,
         "name": "Campaign Concept Generator",
         "description": "Create complete campaign ideas with mapped customer journeys"
     },
     "idea_injection_bot": {
         "fields": IDEA_INJECTION_BOT_FIELDS,
+        "field_descriptions": IDEA_INJECTION_BOT_FIELD_DESCRIPTIONS,
         "name": "Idea Injection Bot",
         "description": "Capture creative insights and lightning-in-a-bottle moments"
     }
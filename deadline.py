@@ -0,0 +1,51 @@
+import asyncio
+import contextvars
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+# Event-loop time by which the current request must be answered; None = no deadline
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request ran past its latency deadline"""
+
+    def __init__(self):
+        super().__init__("The request took too long and was cancelled")
+
+
+def deadline_in(seconds: float) -> Optional[float]:
+    """Deadline ``seconds`` from now, or None when ``seconds`` is 0"""
+    return asyncio.get_running_loop().time() + seconds if seconds else None
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, None without one"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - asyncio.get_running_loop().time()
+
+
+@asynccontextmanager
+async def within(deadline: Optional[float]) -> AsyncIterator[None]:
+    """Run the block under ``deadline``.
+
+    Code inside sees the time left through ``remaining()``, and the block is
+    cancelled (raising DeadlineExceeded) when the deadline passes.
+    """
+    token = _deadline.set(deadline)
+    try:
+        async with asyncio.timeout_at(deadline) as timeout:
+            yield
+    except TimeoutError:
+        if timeout.expired():
+            raise DeadlineExceeded() from None
+        raise
+    finally:
+        _deadline.reset(token)
+
+
+def detached() -> contextvars.Context:
+    """Context for background tasks, which outlive the request and its deadline"""
+    context = contextvars.copy_context()
+    context.run(_deadline.set, None)
+    return context
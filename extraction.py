@@ -0,0 +1,71 @@
+import json
+from typing import Dict, Any, List
+
+# Support running both as a package and as a standalone script
+try:
+    from .constants import GPT_CONFIGS, LIST_FIELDS  # type: ignore
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    from constants import GPT_CONFIGS, LIST_FIELDS  # type: ignore
+
+EXTRACTION_FUNCTION_NAME = "record_fields"
+
+EXTRACTION_SYSTEM_PROMPT = (
+    "You record structured fields from a conversation by calling the record_fields function. "
+    "Be conservative - only fill a field if it is clearly stated, otherwise use null."
+)
+
+
+def build_extraction_schema(gpt_type: str, keys: List[str]) -> Dict[str, Any]:
+    """Build the JSON schema for the requested fields of a GPT type from its config"""
+    gpt_config = GPT_CONFIGS.get(gpt_type, GPT_CONFIGS["offer_clarifier"])
+    descriptions = gpt_config.get("field_descriptions", {})
+
+    properties = {}
+    for key in keys:
+        description = descriptions.get(key, key.replace("_", " "))
+        if key in LIST_FIELDS:
+            properties[key] = {"type": ["array", "null"], "items": {"type": "string"}, "description": description}
+        else:
+            properties[key] = {"type": ["string", "null"], "description": description}
+
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(keys)
+    }
+
+
+def build_extraction_tool(gpt_type: str, keys: List[str]) -> Dict[str, Any]:
+    """Build the function-calling tool definition that forces schema-shaped output"""
+    return {
+        "type": "function",
+        "function": {
+            "name": EXTRACTION_FUNCTION_NAME,
+            "description": f"Record the {GPT_CONFIGS.get(gpt_type, GPT_CONFIGS['offer_clarifier'])['name']} fields stated in the conversation",
+            "parameters": build_extraction_schema(gpt_type, keys)
+        }
+    }
+
+
+def extraction_tool_choice() -> Dict[str, Any]:
+    """Force the model to answer through the extraction function"""
+    return {"type": "function", "function": {"name": EXTRACTION_FUNCTION_NAME}}
+
+
+def parse_extraction(message) -> Dict[str, Any]:
+    """Return the extracted fields from a completion message.
+
+    Raises ValueError when the model returned something that is not a JSON object.
+    """
+    if message.tool_calls:
+        raw = message.tool_calls[0].function.arguments
+    else:
+        raw = message.content or ""
+
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Extraction returned invalid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("Extraction did not return a JSON object")
+    return data
@@ -0,0 +1,98 @@
+from typing import Dict, Any, List, Optional, Tuple
+
+# Support running both as a package and as a standalone script
+try:
+    from .constants import GPT_CONFIGS, DEFAULT_HISTORY_TOKEN_BUDGET, HISTORY_RECENT_MESSAGES, HISTORY_COMPACTION_THRESHOLD  # type: ignore
+    from .tokens import TOKENS_PER_REPLY, count_message_tokens  # type: ignore
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    from constants import GPT_CONFIGS, DEFAULT_HISTORY_TOKEN_BUDGET, HISTORY_RECENT_MESSAGES, HISTORY_COMPACTION_THRESHOLD  # type: ignore
+    from tokens import TOKENS_PER_REPLY, count_message_tokens  # type: ignore
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a coaching conversation. Merge the earlier summary with the new "
+    "messages into one concise summary. Keep every answer, fact, name, number and decision the user has "
+    "given, and note which questions have already been asked. Write plain prose, no preamble."
+)
+
+
+class HistoryManager:
+    """Keeps the conversation sent upstream within a per-GPT-type token budget.
+
+    Older turns are folded into a rolling summary stored on the session while the
+    most recent messages are kept verbatim.
+    """
+
+    def __init__(self, recent_messages: int = HISTORY_RECENT_MESSAGES, threshold: float = HISTORY_COMPACTION_THRESHOLD):
+        self.recent_messages = recent_messages
+        self.threshold = threshold
+
+    def budget_for(self, gpt_type: str) -> int:
+        """Token budget for the prompt of a GPT type"""
+        gpt_config = GPT_CONFIGS.get(gpt_type, GPT_CONFIGS["offer_clarifier"])
+        return gpt_config.get("history_token_budget", DEFAULT_HISTORY_TOKEN_BUDGET)
+
+    def build_messages(self, session: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Messages to send upstream: system prompt, rolling summary and recent turns.
+
+        If the history is still over budget (compaction hasn't caught up yet) the
+        oldest turns are dropped, always keeping the latest message.
+        """
+        system, history = self._preamble(session), session["messages"][1:]
+        budget = self.budget_for(session["gpt_type"])
+        # Counts add up per message, so the prompt is counted once and each
+        # dropped message's share taken off it
+        used = count_message_tokens(system + history)
+        start = 0
+        while len(history) - start > 1 and used > budget:
+            used -= count_message_tokens([history[start]]) - TOKENS_PER_REPLY
+            start += 1
+        return system + history[start:]
+
+    def needs_compaction(self, session: Dict[str, Any]) -> bool:
+        """Whether the history has grown past the compaction threshold of its budget"""
+        if len(session["messages"]) - 1 <= self.recent_messages:
+            return False
+        used = count_message_tokens(self._preamble(session) + session["messages"][1:])
+        return used > self.budget_for(session["gpt_type"]) * self.threshold
+
+    async def summarize(self, session: Dict[str, Any], complete) -> Optional[Tuple[str, int]]:
+        """Summarize everything but the most recent messages into a new rolling summary.
+
+        ``complete`` is the service's metered completion call. Returns the
+        summary and the number of messages it covers, or None if there is
+        nothing to fold. The session is not modified; apply the result with
+        ``fold``.
+        """
+        folded = session["messages"][1:-self.recent_messages]
+        if not folded:
+            return None
+
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in folded)
+        previous = session.get("summary") or "(none)"
+        response = await complete(
+            session, "summary",
+            messages=[
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Earlier summary:\n{previous}\n\nNew messages:\n{transcript}"}
+            ],
+            temperature=0
+        )
+        summary = response.choices[0].message.content
+        if not summary:
+            return None
+        return summary, len(folded)
+
+    def fold(self, session: Dict[str, Any], summary: str, count: int) -> None:
+        """Replace the oldest ``count`` history messages with ``summary``"""
+        # Turns may have been appended while summarizing; drop exactly the folded ones.
+        # history_offset counts folded messages so stores can keep absolute positions.
+        session["summary"] = summary
+        del session["messages"][1:1 + count]
+        session["history_offset"] = session.get("history_offset", 0) + count
+
+    def _preamble(self, session: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """System prompt followed by the rolling summary, if any"""
+        messages = session["messages"][:1]
+        if session.get("summary"):
+            messages = messages + [{"role": "system", "content": f"Summary of the earlier conversation:\n{session['summary']}"}]
+        return messages
@@ -18,7 +18,10 @@ class ChatResponse(BaseModel):
     session_id: str
     reply: str
     fields: Optional[Dict[str, Any]] = None
+    fields_version: Optional[int] = None
+    extraction_pending: Optional[bool] = False
     gpt_type: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None
     is_complete: Optional[bool] = False
 
 class ResetResponse(BaseModel):
@@ -31,7 +34,6 @@ class CombinedSummaryResponse(BaseModel):
 
 class HealthResponse(BaseModel):
     status: str
-    sessions: int
 
 
 class OfferToAvatarHandoffRequest(BaseModel):
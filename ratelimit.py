@@ -0,0 +1,160 @@
+import json
+import math
+import time
+from typing import Any, Dict, Optional
+
+
+class RateLimitExceeded(Exception):
+    """The upstream quota can't admit a call within the queueing budget"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream rate limit reached; retry in {math.ceil(retry_after)}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Per-minute quota as a bucket that refills continuously.
+
+    Costs above the capacity are capped to it, so an oversized call still
+    gets through once the bucket is full.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / 60
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` would be available"""
+        self._refill()
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, limit: Optional[int], remaining: Optional[int]) -> None:
+        """Align with the quota reported by upstream.
+
+        ``remaining`` only ever lowers the level: calls admitted here but still
+        in flight may not be reflected in it yet.
+        """
+        self._refill()
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {"per_minute": int(self.capacity), "available": int(self.level)}
+
+
+class UpstreamRateLimiter:
+    """Per-model RPM and TPM quota of the upstream API.
+
+    Buckets start from the configured limits (0 = unknown) and follow the
+    ``x-ratelimit-*`` headers of every response. Callers check ``wait_time``
+    and then ``take`` the quota; queueing is left to the UpstreamScheduler.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # model -> {"requests": TokenBucket, "tokens": TokenBucket}
+        self._buckets: Dict[str, Dict[str, TokenBucket]] = {}
+        self.throttled_responses = 0
+
+    def wait_time(self, model: str, tokens: int) -> float:
+        """Seconds until one request of ``tokens`` tokens fits ``model``'s quota"""
+        costs = {"requests": 1, "tokens": tokens}
+        return max((bucket.wait_time(costs[kind]) for kind, bucket in self._buckets_for(model).items()), default=0.0)
+
+    def take(self, model: str, tokens: int) -> int:
+        """Reserve one request and ``tokens`` tokens of quota.
+
+        Returns the tokens actually reserved (0 while the model's token quota is unknown).
+        """
+        buckets = self._buckets_for(model)
+        if "requests" in buckets:
+            buckets["requests"].take(1)
+        if "tokens" not in buckets:
+            return 0
+        buckets["tokens"].take(tokens)
+        return tokens
+
+    def release(self, model: str, reserved: int) -> None:
+        """Return the quota of a call that was never sent"""
+        buckets = self._buckets.get(model, {})
+        if "requests" in buckets:
+            buckets["requests"].give_back(1)
+        self.settle(model, reserved, 0)
+
+    def settle(self, model: str, reserved: int, used: int) -> None:
+        """Return tokens reserved (as returned by ``take``) for a call that used fewer"""
+        bucket = self._buckets.get(model, {}).get("tokens")
+        if bucket is not None and used < reserved:
+            bucket.give_back(reserved - used)
+
+    async def observe(self, response) -> None:
+        """httpx response hook: follow the quota reported in ``x-ratelimit-*`` headers"""
+        headers = response.headers
+        if response.status_code == 429:
+            self.throttled_responses += 1
+        if "x-ratelimit-limit-requests" not in headers and "x-ratelimit-limit-tokens" not in headers:
+            return
+        try:
+            model = json.loads(response.request.content).get("model")
+        except (ValueError, AttributeError):
+            return
+        if not model:
+            return
+        buckets = self._buckets.setdefault(model, {})
+        for kind in ("requests", "tokens"):
+            limit = self._header_int(headers, f"x-ratelimit-limit-{kind}")
+            remaining = self._header_int(headers, f"x-ratelimit-remaining-{kind}")
+            if kind not in buckets:
+                if not limit:
+                    continue
+                buckets[kind] = TokenBucket(limit)
+            buckets[kind].sync(limit, remaining)
+
+    def stats(self) -> Dict[str, Any]:
+        """Upstream 429s seen and the quota left per model"""
+        return {
+            "throttled_responses": self.throttled_responses,
+            "models": {
+                model: {kind: bucket.stats() for kind, bucket in buckets.items()}
+                for model, buckets in self._buckets.items()
+            }
+        }
+
+    def _buckets_for(self, model: str) -> Dict[str, TokenBucket]:
+        buckets = self._buckets.get(model)
+        if buckets is None:
+            buckets = self._buckets[model] = {}
+            if self.requests_per_minute:
+                buckets["requests"] = TokenBucket(self.requests_per_minute)
+            if self.tokens_per_minute:
+                buckets["tokens"] = TokenBucket(self.tokens_per_minute)
+        return buckets
+
+    @staticmethod
+    def _header_int(headers, name: str) -> Optional[int]:
+        try:
+            return int(headers[name])
+        except (KeyError, ValueError):
+            return None
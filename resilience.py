@@ -0,0 +1,185 @@
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import openai
+
+# Support running both as a package and as a standalone script
+try:
+    from .deadline import remaining  # type: ignore
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    from deadline import remaining  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Upstream is failing; calls are rejected until the breaker's cool-down ends"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream is temporarily unavailable; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive upstream failures.
+
+    While open, calls fail immediately. After ``reset_timeout`` seconds one
+    probe call is let through (half-open); its success closes the breaker and
+    its failure re-opens it. A probe that ends without a verdict (a 429, or
+    cancelled) lets the next call probe instead.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.opens = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Raise CircuitOpenError unless a call may go upstream now; True for the half-open probe"""
+        if self.state == "closed":
+            return False
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if self.state == "open" and remaining <= 0:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        raise CircuitOpenError(max(remaining, 1.0))
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def end_probe(self) -> None:
+        """Free the probe slot of a probe call that ended, with or without a verdict"""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opens += 1
+                logger.warning("Upstream circuit opened after %d failures", self.failures)
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state and counters"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opens": self.opens,
+            "rejected": self.rejected
+        }
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by the upstream response (Retry-After / retry-after-ms), if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(value)
+            return max(retry_at.timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors, timeouts and connection failures are worth retrying"""
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in (408, 409)
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """Failures that mean upstream is degraded (counted by the breaker); 429s and 4xx are not"""
+    if isinstance(error, openai.RateLimitError):
+        return False
+    return isinstance(error, (openai.APIConnectionError, openai.InternalServerError))
+
+
+class ResilientCaller:
+    """Runs upstream calls through a circuit breaker with jittered exponential backoff.
+
+    Retryable failures are retried up to ``max_attempts`` times in total,
+    waiting what the response's Retry-After asks for or else a random delay
+    up to ``base_delay * 2**attempt`` (capped at ``max_delay``). A Retry-After
+    longer than ``max_retry_after``, or a wait past the request's deadline, is
+    not waited out.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8, max_retry_after: float = 20):
+        self.breaker = breaker
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retries = 0
+        self.gave_up = 0
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Call ``fn`` (a fresh upstream request per attempt) with retries"""
+        attempt = 0
+        while True:
+            probe = self.breaker.allow()
+            try:
+                result = await fn()
+                self.breaker.record_success()
+                return result
+            except Exception as e:
+                if is_upstream_failure(e):
+                    self.breaker.record_failure()
+                elif not is_retryable(e):
+                    # The request itself was bad; upstream answered, so it is healthy
+                    self.breaker.record_success()
+                    raise
+                attempt += 1
+                delay = self._delay(e, attempt)
+                if attempt >= self.max_attempts or delay is None:
+                    self.gave_up += 1
+                    raise
+                error = type(e).__name__
+            finally:
+                if probe:
+                    self.breaker.end_probe()
+            self.retries += 1
+            logger.info("Retrying upstream call in %.2fs after %s (attempt %d/%d)", delay, error, attempt + 1, self.max_attempts)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retry counters and breaker state"""
+        return {"retries": self.retries, "gave_up": self.gave_up, "circuit": self.breaker.stats()}
+
+    def _delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None to stop retrying"""
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            delay = retry_after if retry_after <= self.max_retry_after else None
+        else:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        left = remaining()
+        if delay is not None and left is not None and delay >= left:
+            return None
+        return delay
@@ -0,0 +1,212 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+# Support running both as a package and as a standalone script
+try:
+    from .ratelimit import RateLimitExceeded, UpstreamRateLimiter  # type: ignore
+    from .upstream import UpstreamMonitor  # type: ignore
+    from .deadline import DeadlineExceeded, remaining  # type: ignore
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    from ratelimit import RateLimitExceeded, UpstreamRateLimiter  # type: ignore
+    from upstream import UpstreamMonitor  # type: ignore
+    from deadline import DeadlineExceeded, remaining  # type: ignore
+
+# Call roles from most to least urgent: the interactive reply a user is waiting
+# on, the "ask the next question" nudge, background field extraction, and the
+# rolling history summary. Unknown roles rank last.
+PRIORITY_CLASSES = ("reply", "proceed", "extraction", "summary")
+# Classes no user is waiting on may queue for longer
+BACKGROUND_CLASSES = ("extraction", "summary")
+
+
+class _ClassStats:
+    """Queue depth and wait-time counters of one priority class.
+
+    Wait percentiles cover the calls admitted within ``window_seconds``.
+    """
+
+    def __init__(self, window_seconds: float = 60, max_samples: int = 500):
+        self.window_seconds = window_seconds
+        self.waiting = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.max_wait = 0.0
+        # (admitted_at, seconds queued) of the most recent calls
+        self._waits: "deque[tuple]" = deque(maxlen=max_samples)
+
+    def record_wait(self, seconds: float) -> None:
+        self._waits.append((time.monotonic(), seconds))
+        self.max_wait = max(self.max_wait, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        cutoff = time.monotonic() - self.window_seconds
+        waits = [seconds for admitted_at, seconds in self._waits if admitted_at >= cutoff]
+        return {
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "wait_p50_seconds": round(UpstreamMonitor.percentile(waits, 50), 4),
+            "wait_p95_seconds": round(UpstreamMonitor.percentile(waits, 95), 4),
+            "wait_max_seconds": round(self.max_wait, 4)
+        }
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "role", "model", "tokens", "enqueued_at", "future")
+
+    def __init__(self, priority: int, seq: int, role: str, model: str, tokens: int):
+        self.priority = priority
+        self.seq = seq
+        self.role = role
+        self.model = model
+        self.tokens = tokens
+        self.enqueued_at = time.monotonic()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class UpstreamScheduler:
+    """Priority admission of upstream calls.
+
+    A call runs at once while fewer than ``max_concurrency`` calls are in
+    flight, its model's quota (see UpstreamRateLimiter) has room and nothing
+    is queued. Otherwise it queues, and queued calls are admitted by priority
+    class, first come first served within a class. A call still queued after
+    ``max_wait`` seconds (``background_max_wait`` for background classes), or
+    whose quota alone would take longer, is refused with RateLimitExceeded;
+    one whose quota won't free up before the request's deadline is refused
+    with DeadlineExceeded.
+    """
+
+    def __init__(self, limiter: UpstreamRateLimiter, max_concurrency: int = 100, max_wait: float = 5, background_max_wait: float = 30, window_seconds: float = 60):
+        self.limiter = limiter
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self.background_max_wait = background_max_wait
+        self.window_seconds = window_seconds
+        self.in_flight = 0
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._wake: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._classes: Dict[str, _ClassStats] = {role: _ClassStats(window_seconds) for role in PRIORITY_CLASSES}
+
+    @asynccontextmanager
+    async def slot(self, role: str, model: str, tokens: int) -> AsyncIterator[int]:
+        """Hold an upstream slot for a call; yields the tokens reserved from the quota"""
+        stats = self._classes.setdefault(role, _ClassStats(self.window_seconds))
+        reserved = await self._admit(role, stats, model, tokens)
+        try:
+            yield reserved
+        finally:
+            self.in_flight -= 1
+            stats.in_flight -= 1
+            self._notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """Slots in use and per-class queue depth and wait times"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": sum(1 for waiter in self._waiting if not waiter.future.done()),
+            "classes": {role: stats.stats() for role, stats in self._classes.items()}
+        }
+
+    def interactive_backlog(self) -> Tuple[int, float]:
+        """Calls a user waits on that are queued now, and their recent p95 queueing time"""
+        classes = [stats.stats() for role, stats in self._classes.items() if role not in BACKGROUND_CLASSES]
+        return sum(stats["waiting"] for stats in classes), max((stats["wait_p95_seconds"] for stats in classes), default=0.0)
+
+    async def _admit(self, role: str, stats: _ClassStats, model: str, tokens: int) -> int:
+        max_wait = self.background_max_wait if role in BACKGROUND_CLASSES else self.max_wait
+        quota_wait = self.limiter.wait_time(model, tokens)
+        if quota_wait > max_wait:
+            stats.rejected += 1
+            raise RateLimitExceeded(quota_wait)
+        left = remaining()
+        if left is not None and quota_wait >= left:
+            stats.rejected += 1
+            raise DeadlineExceeded()
+        if not self._waiting and self.in_flight < self.max_concurrency and quota_wait <= 0:
+            stats.record_wait(0.0)
+            return self._start(stats, model, tokens)
+
+        priority = PRIORITY_CLASSES.index(role) if role in PRIORITY_CLASSES else len(PRIORITY_CLASSES)
+        waiter = _Waiter(priority, next(self._seq), role, model, tokens)
+        self._waiting.append(waiter)
+        stats.queued += 1
+        stats.waiting += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wake = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        self._notify()
+        try:
+            return await asyncio.wait_for(waiter.future, max_wait)
+        except asyncio.TimeoutError:
+            stats.rejected += 1
+            raise RateLimitExceeded(max(self.limiter.wait_time(model, tokens), max_wait))
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as the caller went away: give the slot and quota back
+                self.in_flight -= 1
+                stats.in_flight -= 1
+                self.limiter.release(model, waiter.future.result())
+                self._notify()
+            raise
+        finally:
+            stats.waiting -= 1
+
+    def _notify(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    def _start(self, stats: _ClassStats, model: str, tokens: int) -> int:
+        self.in_flight += 1
+        stats.in_flight += 1
+        stats.admitted += 1
+        return self.limiter.take(model, tokens)
+
+    async def _dispatch(self) -> None:
+        """Admit queued calls as slots free up and quota refills"""
+        while self._waiting:
+            self._wake.clear()
+            delay = self._admit_ready()
+            if not self._waiting:
+                break
+            try:
+                # Woken early by a newly queued or a finished call
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _admit_ready(self) -> Optional[float]:
+        """Admit what can run now, by priority; returns seconds until quota frees up for the rest"""
+        self._waiting = sorted(waiter for waiter in self._waiting if not waiter.future.done())
+        delay = None
+        # A model whose next queued call lacks quota admits nothing behind it
+        blocked = set()
+        for waiter in self._waiting:
+            if self.in_flight >= self.max_concurrency:
+                break
+            if waiter.model in blocked:
+                continue
+            wait = self.limiter.wait_time(waiter.model, waiter.tokens)
+            if wait > 0:
+                blocked.add(waiter.model)
+                delay = wait if delay is None else min(delay, wait)
+                continue
+            stats = self._classes[waiter.role]
+            stats.record_wait(time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(self._start(stats, waiter.model, waiter.tokens))
+        self._waiting = [waiter for waiter in self._waiting if not waiter.future.done()]
+        return delay
@@ -1,40 +1,137 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from contextlib import aclosing
 import uuid
 import json
 import re
-from typing import Dict, Any, Optional
-from openai import OpenAI
+import logging
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
 import os
 
 # Support running both as a package and as a standalone script
 try:
-    from .constants import GPT_CONFIGS  # type: ignore
+    from .constants import GPT_CONFIGS, DEFAULT_MODEL_ROUTES  # type: ignore
     from .prompts import GPT_PROMPTS  # type: ignore
+    from .extraction import EXTRACTION_SYSTEM_PROMPT, build_extraction_tool, extraction_tool_choice, parse_extraction  # type: ignore
+    from .history import HistoryManager  # type: ignore
+    from .usage import UsageMeter, add_usage, empty_usage  # type: ignore
+    from .cache import CompletionCache  # type: ignore
+    from .singleflight import SingleFlight  # type: ignore
+    from .session_store import SessionStore, SessionConflictError, create_session_store  # type: ignore
+    from .session_locks import SessionLocks  # type: ignore
+    from .session import Session  # type: ignore
+    from .sweeper import SessionSweeper  # type: ignore
+    from .snapshot import SnapshotDecoder, SnapshotError, encode_snapshot  # type: ignore
+    from .upstream import PoolMonitor, UpstreamMonitor, create_http_client  # type: ignore
+    from .resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, is_retryable  # type: ignore
+    from .ratelimit import RateLimitExceeded, UpstreamRateLimiter  # type: ignore
+    from .scheduler import UpstreamScheduler  # type: ignore
+    from .deadline import DeadlineExceeded, deadline_in, detached, within  # type: ignore
+    from .tokens import count_message_tokens, count_text_tokens  # type: ignore
+    from . import settings  # type: ignore
 except ImportError:  # pragma: no cover - fallback for direct script execution
-    from constants import GPT_CONFIGS  # type: ignore
+    from constants import GPT_CONFIGS, DEFAULT_MODEL_ROUTES  # type: ignore
     from prompts import GPT_PROMPTS  # type: ignore
+    from extraction import EXTRACTION_SYSTEM_PROMPT, build_extraction_tool, extraction_tool_choice, parse_extraction  # type: ignore
+    from history import HistoryManager  # type: ignore
+    from usage import UsageMeter, add_usage, empty_usage  # type: ignore
+    from cache import CompletionCache  # type: ignore
+    from singleflight import SingleFlight  # type: ignore
+    from session_store import SessionStore, SessionConflictError, create_session_store  # type: ignore
+    from session_locks import SessionLocks  # type: ignore
+    from session import Session  # type: ignore
+    from sweeper import SessionSweeper  # type: ignore
+    from snapshot import SnapshotDecoder, SnapshotError, encode_snapshot  # type: ignore
+    from upstream import PoolMonitor, UpstreamMonitor, create_http_client  # type: ignore
+    from resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, is_retryable  # type: ignore
+    from ratelimit import RateLimitExceeded, UpstreamRateLimiter  # type: ignore
+    from scheduler import UpstreamScheduler  # type: ignore
+    from deadline import DeadlineExceeded, deadline_in, detached, within  # type: ignore
+    from tokens import count_message_tokens, count_text_tokens  # type: ignore
+    import settings  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Exchanges whose extraction failed upstream are retried with the next one, up to this many
+# messages per session, for at most this many sessions
+MAX_DEFERRED_MESSAGES = 6
+MAX_DEFERRED_SESSIONS = 1000
 
 class GPTService:
-    def __init__(self):
-        # Initialize OpenAI client with explicit httpx configuration
+    def __init__(self, store: Optional[SessionStore] = None):
+        # The one async OpenAI client of the process; its pooled httpx client is
+        # sized from settings and reports pool waits for readiness
+        self.pool = PoolMonitor(settings.OPENAI_MAX_CONNECTIONS)
+        # Calls are admitted against the per-model RPM/TPM quota, which follows the x-ratelimit-* headers
+        self.limiter = UpstreamRateLimiter(
+            requests_per_minute=settings.OPENAI_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.OPENAI_TOKENS_PER_MINUTE
+        )
+        # When quota or slots run short, queued calls go by role: replies first, summaries last
+        self.scheduler = UpstreamScheduler(
+            self.limiter,
+            max_concurrency=settings.UPSTREAM_MAX_CONCURRENCY,
+            max_wait=settings.UPSTREAM_QUEUE_MAX_WAIT_SECONDS,
+            background_max_wait=settings.UPSTREAM_BACKGROUND_MAX_WAIT_SECONDS,
+            window_seconds=settings.UPSTREAM_LATENCY_WINDOW_SECONDS
+        )
+        # Retries are ours (ResilientCaller), not the SDK's, so they go through the circuit breaker
         try:
-            import httpx
-            self.client = OpenAI(
+            self.client = AsyncOpenAI(
                 api_key=os.getenv("OPENAI_API_KEY"),
-                http_client=httpx.Client(
-                    timeout=httpx.Timeout(30.0, connect=10.0),
-                    limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
-                )
+                http_client=create_http_client(self.pool, on_response=self.limiter.observe),
+                max_retries=0
             )
         except Exception as e:
             # Fallback to basic initialization if httpx configuration fails
-            self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        # Failed upstream calls are retried with backoff; a run of failures opens the circuit and calls fail fast
+        self.resilience = ResilientCaller(
+            CircuitBreaker(settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_SECONDS),
+            max_attempts=settings.UPSTREAM_MAX_ATTEMPTS,
+            base_delay=settings.UPSTREAM_BACKOFF_BASE_SECONDS,
+            max_delay=settings.UPSTREAM_BACKOFF_MAX_SECONDS,
+            max_retry_after=settings.UPSTREAM_MAX_RETRY_AFTER_SECONDS
+        )
         
-        self.sessions: Dict[str, Dict[str, Any]] = {}
-
-    def handoff_offer_to_avatar(self, offer_session_id: str) -> Dict[str, Any]:
+        # All session access goes through the store selected by SESSION_BACKEND
+        self.sessions: SessionStore = store or create_session_store()
+        # Turns and background updates on the same session run one at a time
+        self.locks = SessionLocks()
+        # Expired sessions are evicted in small slices by a background task (started with the app)
+        self.sweeper = SessionSweeper(
+            self.sessions,
+            interval=settings.SESSION_SWEEP_INTERVAL_SECONDS,
+            batch_size=settings.SESSION_SWEEP_BATCH_SIZE
+        )
+        # Background field extraction per session; the latest task chains on the previous one
+        self._extraction_tasks: Dict[str, asyncio.Task] = {}
+        # Exchanges whose extraction failed because upstream was unavailable, retried with the next turn's
+        self._deferred_exchanges: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        # Token-budgeted history: older turns are folded into a rolling summary in the background
+        self.history = HistoryManager()
+        self._compaction_tasks: Dict[str, asyncio.Task] = {}
+        # Prompt/completion token totals per session, GPT type and call role
+        self.usage = UsageMeter()
+        # Deterministic (temperature=0) completions are served from cache when repeated
+        self.cache = CompletionCache(
+            max_entries=settings.COMPLETION_CACHE_SIZE,
+            ttl_seconds=settings.COMPLETION_CACHE_TTL_SECONDS,
+            persist_dir=settings.COMPLETION_CACHE_DIR or None
+        )
+        # Duplicate chat requests (double posts, client retries) share one in-flight turn
+        self.inflight = SingleFlight()
+        # Upstream calls in flight and their recent latency, for readiness
+        self.upstream = UpstreamMonitor(window_seconds=settings.UPSTREAM_LATENCY_WINDOW_SECONDS)
+
+    async def handoff_offer_to_avatar(self, offer_session_id: str) -> Dict[str, Any]:
         """Create an avatar_creator session prefilled from an offer_clarifier session."""
         # Validate source session
-        if offer_session_id not in self.sessions:
+        source = await self.sessions.get_meta(offer_session_id)
+        if source is None:
             return {
                 "avatar_session_id": "",
                 "gpt_type": "avatar_creator",
@@ -43,7 +140,6 @@ class GPTService:
                 "error": "Offer session not found"
             }
 
-        source = self.sessions[offer_session_id]
         if source.get("gpt_type") != "offer_clarifier":
             return {
                 "avatar_session_id": "",
@@ -76,23 +172,21 @@ class GPTService:
             prefilled["purchase_drivers"] = [p for p in prefilled["purchase_drivers"] if p]
 
         # Create new avatar_creator session
-        avatar_session = self.select_gpt("avatar_creator")
-        avatar_session_id = avatar_session["session_id"]
-        self.sessions[avatar_session_id]["fields"].update({k: v for k, v in prefilled.items() if v})
+        avatar_session_id, avatar_session = await self._create_session("avatar_creator", {k: v for k, v in prefilled.items() if v})
 
         greeting = self._get_greeting("avatar_creator")
         return {
             "avatar_session_id": avatar_session_id,
             "gpt_type": "avatar_creator",
             "greeting": greeting,
-            "prefilled_fields": self.sessions[avatar_session_id]["fields"]
+            "prefilled_fields": avatar_session["fields"]
         }
 
-    def handoff_avatar_to_before(self, avatar_session_id: str) -> Dict[str, Any]:
+    async def handoff_avatar_to_before(self, avatar_session_id: str) -> Dict[str, Any]:
         """Create a before_state_research session seeded from an avatar_creator session."""
-        if avatar_session_id not in self.sessions:
+        source = await self.sessions.get_meta(avatar_session_id)
+        if source is None:
             return {"error": "Avatar session not found"}
-        source = self.sessions[avatar_session_id]
         if source.get("gpt_type") != "avatar_creator":
             return {"error": "Source session is not an avatar_creator session"}
 
@@ -102,21 +196,19 @@ class GPTService:
             "avatar_input": json.dumps(avatar_fields)
         }
         # Create new session
-        before = self.select_gpt("before_state_research")
-        before_session_id = before["session_id"]
-        self.sessions[before_session_id]["fields"].update(seeded)
+        before_session_id, before = await self._create_session("before_state_research", seeded)
         return {
             "before_session_id": before_session_id,
             "gpt_type": "before_state_research",
             "greeting": self._get_greeting("before_state_research"),
-            "prefilled_fields": self.sessions[before_session_id]["fields"]
+            "prefilled_fields": before["fields"]
         }
 
-    def handoff_avatar_to_after(self, avatar_session_id: str) -> Dict[str, Any]:
+    async def handoff_avatar_to_after(self, avatar_session_id: str) -> Dict[str, Any]:
         """Create an after_state_research session seeded from an avatar_creator session."""
-        if avatar_session_id not in self.sessions:
+        source = await self.sessions.get_meta(avatar_session_id)
+        if source is None:
             return {"error": "Avatar session not found"}
-        source = self.sessions[avatar_session_id]
         if source.get("gpt_type") != "avatar_creator":
             return {"error": "Source session is not an avatar_creator session"}
 
@@ -124,27 +216,17 @@ class GPTService:
         seeded = {
             "avatar_input": json.dumps(avatar_fields)
         }
-        after = self.select_gpt("after_state_research")
-        after_session_id = after["session_id"]
-        self.sessions[after_session_id]["fields"].update(seeded)
+        after_session_id, after = await self._create_session("after_state_research", seeded)
         return {
             "after_session_id": after_session_id,
             "gpt_type": "after_state_research",
             "greeting": self._get_greeting("after_state_research"),
-            "prefilled_fields": self.sessions[after_session_id]["fields"]
+            "prefilled_fields": after["fields"]
         }
     
-    def select_gpt(self, gpt_type: str) -> Dict[str, Any]:
+    async def select_gpt(self, gpt_type: str) -> Dict[str, Any]:
         """Select which GPT to use for the session"""
-        session_id = str(uuid.uuid4())
-        gpt_config = GPT_CONFIGS.get(gpt_type, GPT_CONFIGS["offer_clarifier"])
-        
-        self.sessions[session_id] = {
-            "gpt_type": gpt_type,
-            "messages": [{"role": "system", "content": GPT_PROMPTS.get(gpt_type, GPT_PROMPTS["offer_clarifier"])}],
-            "fields": {field: None for field in gpt_config["fields"]},
-            "current_question": 0  # Track which question we're on
-        }
+        session_id, _ = await self._create_session(gpt_type)
         
         # Get greeting based on GPT type
         greeting = self._get_greeting(gpt_type)
@@ -155,24 +237,40 @@ class GPTService:
             "greeting": greeting
         }
     
-    def chat(self, req) -> Dict[str, Any]:
-        """Handle chat messages with the selected GPT"""
+    async def chat(self, req) -> Dict[str, Any]:
+        """Handle chat messages with the selected GPT.
+
+        Identical messages posted to the same session while a turn is in flight
+        are coalesced into that turn and receive its result. The turn must
+        finish within CHAT_DEADLINE_SECONDS, and is cancelled (leaving the
+        session as it was) past it or when every caller has gone away.
+        """
+        deadline = deadline_in(settings.CHAT_DEADLINE_SECONDS)
+        if not req.session_id:
+            return await self._chat_turn(req, deadline)
+        message_hash = hashlib.sha256(req.message.strip().encode("utf-8")).hexdigest()
+        return await self.inflight.do((req.session_id, message_hash), lambda: self._chat_turn(req, deadline))
+
+    async def _chat_turn(self, req, deadline: Optional[float]) -> Dict[str, Any]:
+        """Run one chat turn under the session lock and persist the session afterwards"""
         session_id = req.session_id or str(uuid.uuid4())
-        gpt_type = req.gpt_type or "offer_clarifier"
-        
-        # Initialize new session if doesn't exist
-        if session_id not in self.sessions:
-            gpt_config = GPT_CONFIGS.get(gpt_type, GPT_CONFIGS["offer_clarifier"])
-            self.sessions[session_id] = {
-                "gpt_type": gpt_type,
-                "messages": [{"role": "system", "content": GPT_PROMPTS.get(gpt_type, GPT_PROMPTS["offer_clarifier"])}],
-                "fields": {field: None for field in gpt_config["fields"]},
-                "current_question": 0
-            }
-        
-        session = self.sessions[session_id]
-        user_message = req.message.strip()
-        
+        async with self.locks.hold(session_id):
+            session_id, session = await self._ensure_session(session_id, req.gpt_type)
+            base = self._turn_base(session)
+            turn_start = len(session["messages"])
+            try:
+                async with within(deadline):
+                    return await self._reply(session_id, session, req.message.strip())
+            except (RateLimitExceeded, DeadlineExceeded, asyncio.CancelledError):
+                # Nothing was answered; drop the message so the client can resend it
+                del session["messages"][turn_start:]
+                raise
+            finally:
+                # Finish the save even if the turn was cancelled
+                await asyncio.shield(self._save_turn(session_id, session, base))
+
+    async def _reply(self, session_id: str, session: Dict[str, Any], user_message: str) -> Dict[str, Any]:
+        """Record the user message, reply and schedule extraction"""
         # Add user message to conversation
         session["messages"].append({"role": "user", "content": user_message})
         
@@ -182,59 +280,216 @@ class GPTService:
         
         # Check if user wants to proceed
         if self._wants_to_proceed(user_message):
-            return self._handle_proceed_request(session_id, session)
+            return await self._handle_proceed_request(session_id, session)
+        
+        # Fields completed by the previous turn's background extraction
+        if all(session["fields"].values()):
+            return {
+                "session_id": session_id,
+                "reply": self._generate_final_report(session["fields"], session["gpt_type"]),
+                "fields": session["fields"],
+                "fields_version": session["fields_version"],
+                "extraction_pending": False,
+                "gpt_type": session["gpt_type"],
+                "usage": session["usage"],
+                "is_complete": True
+            }
         
         # Generate AI response
         try:
-            chat_resp = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=session["messages"],
+            chat_resp = await self._complete(
+                session, "reply",
+                messages=self.history.build_messages(session),
                 temperature=0.8
             )
             reply = chat_resp.choices[0].message.content
             session["messages"].append({"role": "assistant", "content": reply})
             
-            # Extract structured data from conversation
-            self._extract_fields(session)
-            
-            # Check if complete
-            is_complete = all(session["fields"].values())
-            if is_complete:
-                final_report = self._generate_final_report(session["fields"], session["gpt_type"])
-                return {
-                    "session_id": session_id,
-                    "reply": final_report,
-                    "fields": session["fields"],
-                    "gpt_type": session["gpt_type"],
-                    "is_complete": True
-                }
+            # Extract structured data in the background; results land on the fields endpoint
+            self._schedule_extraction(session_id, session, [{"role": "user", "content": user_message}, {"role": "assistant", "content": reply}])
+            self._schedule_compaction(session_id, session)
             
             return {
                 "session_id": session_id,
                 "reply": reply,
                 "fields": session["fields"],
+                "fields_version": session["fields_version"],
+                "extraction_pending": True,
                 "gpt_type": session["gpt_type"],
+                "usage": session["usage"],
                 "is_complete": False
             }
             
         except Exception as e:
+            if isinstance(e, (RateLimitExceeded, DeadlineExceeded)):
+                raise
             return {
                 "session_id": session_id,
-                "reply": f"I encountered an error: {str(e)}. Please try again.",
+                "reply": self._upstream_error_reply(e),
                 "fields": session["fields"],
                 "gpt_type": session["gpt_type"],
+                "usage": session["usage"],
                 "is_complete": False
             }
     
-    def reset_session(self, session_id: str) -> Dict[str, str]:
+    async def chat_stream(self, req) -> AsyncIterator[str]:
+        """Handle a chat message, streaming the reply as Server-Sent Events.
+
+        Emits ``token`` events while the reply is generated and a final
+        ``fields`` event once extraction has run for the turn. A reply cut
+        short by the deadline or a disconnect leaves the session as it was.
+        """
+        deadline = deadline_in(settings.CHAT_DEADLINE_SECONDS)
+        session_id = req.session_id or str(uuid.uuid4())
+        started = replied = timed_out = False
+        async with self.locks.hold(session_id):
+            session_id, session = await self._ensure_session(session_id, req.gpt_type)
+            base = self._turn_base(session)
+            turn_start = len(session["messages"])
+            events = self._stream_reply(session_id, session, req.message.strip())
+            try:
+                while True:
+                    # The deadline covers producing each event, not the client reading it
+                    try:
+                        async with within(deadline):
+                            item = await anext(events, None)
+                    except DeadlineExceeded:
+                        if not started:
+                            raise
+                        timed_out = True
+                        break
+                    if item is None:
+                        break
+                    event, data = item
+                    replied = replied or event == "reply_done"
+                    started = True
+                    yield self._sse(event, data)
+                if timed_out and not replied:
+                    del session["messages"][turn_start:]
+            except BaseException:
+                # Rate limited, timed out, or the client went away (cancelled or closed) mid-reply
+                if not replied:
+                    del session["messages"][turn_start:]
+                raise
+            finally:
+                # Release the upstream call and save even if the stream was cancelled
+                await asyncio.shield(self._end_stream_turn(events, session_id, session, base))
+
+        if timed_out:
+            yield self._sse("error", {"session_id": session_id, "error": str(DeadlineExceeded())})
+            return
+        if not replied:
+            return
+        # The reply is already delivered and the lock released (extraction merges
+        # under it); push the extraction result when it lands
+        task = self._extraction_tasks.get(session_id)
+        if task:
+            await asyncio.shield(task)
+        session = await self.sessions.get_meta(session_id) or session
+        event = self._fields_event(session_id, session)
+        if event["is_complete"]:
+            event["final_report"] = self._generate_final_report(session["fields"], session["gpt_type"])
+        yield self._sse("fields", event)
+
+    async def _end_stream_turn(self, events: AsyncIterator, session_id: str, session: Dict[str, Any], base: Tuple[int, int, Dict[str, Any]]) -> None:
+        """Close a streamed turn's reply generator and persist the session"""
+        try:
+            await events.aclose()
+        finally:
+            await self._save_turn(session_id, session, base)
+
+    async def _stream_reply(self, session_id: str, session: Dict[str, Any], user_message: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Record the user message and stream the reply as (event, data) pairs"""
+        session["messages"].append({"role": "user", "content": user_message})
+
+        if self._wants_summary(user_message):
+            result = self._handle_summary_request(session_id, session)
+            yield "token", {"content": result["reply"]}
+            yield "fields", self._fields_event(session_id, session)
+            return
+
+        nudge_at = None
+        if self._wants_to_proceed(user_message):
+            missing_fields = [f for f, v in session["fields"].items() if not v]
+            if not missing_fields:
+                yield "token", {"content": "Great! We've covered all the key areas. Would you like me to generate a summary report?"}
+                yield "fields", self._fields_event(session_id, session)
+                return
+            nudge_at = len(session["messages"])
+            session["messages"].append({"role": "system", "content": f"User wants to proceed. Missing fields: {missing_fields}. Ask the next logical question naturally."})
+
+        elif all(session["fields"].values()):
+            final_report = self._generate_final_report(session["fields"], session["gpt_type"])
+            yield "token", {"content": final_report}
+            yield "fields", dict(self._fields_event(session_id, session), final_report=final_report)
+            return
+
+        try:
+            role = "reply" if nudge_at is None else "proceed"
+            parts = []
+            deltas = self._complete_stream(
+                session, role,
+                messages=self.history.build_messages(session),
+                temperature=0.8
+            )
+            async with aclosing(deltas):
+                async for delta in deltas:
+                    parts.append(delta)
+                    yield "token", {"content": delta}
+            reply = "".join(parts)
+            session["messages"].append({"role": "assistant", "content": reply})
+
+            exchange = [{"role": "user", "content": user_message}, {"role": "assistant", "content": reply}]
+            self._schedule_extraction(session_id, session, exchange)
+            self._schedule_compaction(session_id, session)
+            yield "reply_done", {"session_id": session_id}
+
+        except (RateLimitExceeded, DeadlineExceeded):
+            raise
+        except Exception as e:
+            if nudge_at is not None:
+                # The nudge only makes sense next to the reply it asked for
+                del session["messages"][nudge_at:]
+            yield "error", {"session_id": session_id, "error": self._upstream_error_reply(e)}
+
+    async def get_fields(self, session_id: str, since: Optional[int] = None, wait: float = 0) -> Dict[str, Any]:
+        """Return the extracted fields of a session and their version.
+
+        When ``since`` is given and no newer version exists yet, waits up to
+        ``wait`` seconds for a pending background extraction to land.
+        """
+        session = await self.sessions.get_meta(session_id)
+        if session is None:
+            return {"error": "Session not found"}
+
+        task = self._extraction_tasks.get(session_id)
+        if task and since is not None and session["fields_version"] <= since and wait > 0:
+            try:
+                await asyncio.wait_for(asyncio.shield(task), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+            session = await self.sessions.get_meta(session_id) or session
+
+        result = self._fields_event(session_id, session)
+        if result["is_complete"]:
+            result["final_report"] = self._generate_final_report(session["fields"], session["gpt_type"])
+        return result
+
+    async def reset_session(self, session_id: str) -> Dict[str, str]:
         """Reset a conversation session"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        for tasks in (self._extraction_tasks, self._compaction_tasks):
+            task = tasks.pop(session_id, None)
+            if task:
+                task.cancel()
+        self._deferred_exchanges.pop(session_id, None)
+        # Wait for an in-flight turn so its final save can't resurrect the session
+        async with self.locks.hold(session_id):
+            await self.sessions.delete(session_id)
         return {"status": "reset", "session_id": session_id}
     
-    def get_combined_summary(self, session_ids: list) -> Dict[str, Any]:
+    async def get_combined_summary(self, session_ids: list) -> Dict[str, Any]:
         """Generate a combined summary from multiple GPT sessions"""
-        combined_data = self._collect_session_data(session_ids)
+        combined_data = await self._collect_session_data(session_ids)
         
         if not combined_data["sessions_found"]:
             return {"error": "No valid sessions found"}
@@ -246,10 +501,321 @@ class GPTService:
             "sessions_data": combined_data["sessions_found"]
         }
     
-    def get_session_count(self) -> int:
+    async def export_sessions(self) -> AsyncIterator[bytes]:
+        """Stream every live session as a compressed snapshot (see snapshot.py)"""
+        async for chunk in encode_snapshot(self.sessions.scan()):
+            yield chunk
+
+    async def import_sessions(self, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """Load sessions from a streamed snapshot, replacing sessions with the same id.
+
+        The whole snapshot is decoded and checked before any session is
+        written, so an invalid one imports nothing.
+        """
+        decoder = SnapshotDecoder()
+        records = []
+        try:
+            async for chunk in chunks:
+                records.extend(decoder.feed(chunk))
+            decoder.close()
+        except SnapshotError as e:
+            return {"error": f"Invalid snapshot: {e}", "imported": 0, "replaced": 0}
+        replaced = 0
+        for session_id, data in records:
+            replaced += await self._import_session(session_id, data)
+        return {"status": "imported", "imported": len(records), "replaced": replaced}
+
+    async def _import_session(self, session_id: str, data: Dict[str, Any]) -> bool:
+        """Store one imported session; returns True if it replaced an existing one"""
+        session = Session.from_dict(data)
+        async with self.locks.hold(session_id):
+            existing = await self.sessions.get_meta(session_id)
+            # Take over the stored version so the save overwrites instead of conflicting,
+            # and rewrite it in full rather than as changes to what was stored
+            session["version"] = existing["version"] if existing else 0
+            await self.sessions.save(session_id, session, replace=True)
+        return existing is not None
+
+    async def close(self) -> None:
+        """Stop background sweeping, flush and release the session store and close the HTTP pool"""
+        await self.sweeper.stop()
+        await self.sessions.close()
+        await self.client.close()
+
+    def get_usage(self) -> Dict[str, Any]:
+        """Get token usage totals per GPT type and call role"""
+        return self.usage.snapshot()
+    
+    async def get_session_count(self) -> int:
         """Get the number of active sessions"""
-        return len(self.sessions)
+        return await self.sessions.count()
+
+    async def get_readiness(self) -> Dict[str, Any]:
+        """Capacity report; ``status`` is "overloaded" with reasons when this node should shed traffic"""
+        by_type = await self.sessions.count_by_type()
+        session_memory = self.sessions.resident_bytes()
+        upstream = self.upstream.stats()
+        saturation = self.pool.saturation()
+
+        reasons = []
+        if settings.READINESS_MAX_POOL_SATURATION and saturation > settings.READINESS_MAX_POOL_SATURATION:
+            reasons.append(f"HTTP pool saturation {saturation:.2f} exceeds {settings.READINESS_MAX_POOL_SATURATION}")
+        if settings.READINESS_MAX_LATENCY_SECONDS and upstream["latency_p95_seconds"] > settings.READINESS_MAX_LATENCY_SECONDS:
+            reasons.append(f"Upstream p95 latency {upstream['latency_p95_seconds']}s exceeds {settings.READINESS_MAX_LATENCY_SECONDS}s")
+        # Calls beyond UPSTREAM_MAX_CONCURRENCY queue in the scheduler rather than the HTTP pool
+        queued, queue_wait = self.scheduler.interactive_backlog()
+        queue_depth = queued / max(self.scheduler.max_concurrency, 1)
+        if settings.READINESS_MAX_QUEUE_DEPTH and queue_depth > settings.READINESS_MAX_QUEUE_DEPTH:
+            reasons.append(f"Upstream queue depth {queue_depth:.2f} exceeds {settings.READINESS_MAX_QUEUE_DEPTH}")
+        if settings.READINESS_MAX_QUEUE_WAIT_SECONDS and queue_wait > settings.READINESS_MAX_QUEUE_WAIT_SECONDS:
+            reasons.append(f"Upstream queue p95 wait {queue_wait}s exceeds {settings.READINESS_MAX_QUEUE_WAIT_SECONDS}s")
+        memory_limit = settings.READINESS_MAX_SESSION_MEMORY_MB * 2**20
+        if memory_limit and session_memory > memory_limit:
+            reasons.append(f"Session memory {session_memory / 2**20:.1f} MB exceeds {settings.READINESS_MAX_SESSION_MEMORY_MB} MB")
+
+        return {
+            "status": "overloaded" if reasons else "ready",
+            "reasons": reasons,
+            "sessions": {"total": sum(by_type.values()), "by_gpt_type": by_type},
+            "session_memory_bytes": session_memory,
+            "upstream": upstream,
+            "upstream_retries": self.resilience.stats(),
+            "upstream_rate_limit": self.limiter.stats(),
+            "upstream_scheduler": self.scheduler.stats(),
+            "http_pool": self.pool.stats(),
+            "session_store": self.sessions.stats(),
+            "completion_cache": self.cache.stats(),
+            "chat_inflight": self.inflight.stats(),
+            "session_locks": self.locks.stats(),
+            "session_sweeper": self.sweeper.stats()
+        }
     
+    def _new_session(self, gpt_type: str) -> Session:
+        """Build a fresh session for a GPT type"""
+        gpt_config = GPT_CONFIGS.get(gpt_type, GPT_CONFIGS["offer_clarifier"])
+        return Session(gpt_type, GPT_PROMPTS.get(gpt_type, GPT_PROMPTS["offer_clarifier"]), gpt_config["fields"])
+
+    async def _create_session(self, gpt_type: str, seed_fields: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+        """Create and store a new session, optionally prefilling some fields"""
+        session_id = str(uuid.uuid4())
+        session = self._new_session(gpt_type)
+        if seed_fields:
+            session["fields"].update(seed_fields)
+        await self.sessions.save(session_id, session)
+        return session_id, session
+
+    async def _ensure_session(self, session_id: Optional[str], gpt_type: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+        """Return the session for ``session_id``, creating it if it doesn't exist"""
+        session_id = session_id or str(uuid.uuid4())
+        gpt_type = gpt_type or "offer_clarifier"
+
+        session = await self.sessions.get(session_id)
+        if session is None:
+            session = self._new_session(gpt_type)
+            await self.sessions.save(session_id, session)
+
+        return session_id, session
+
+    @staticmethod
+    def _turn_base(session: Dict[str, Any]) -> Tuple[int, int, Dict[str, Any]]:
+        """Message count, history offset and usage of a session when a turn starts"""
+        return len(session["messages"]), session.get("history_offset", 0), dict(session["usage"])
+
+    async def _save_turn(self, session_id: str, session: Dict[str, Any], base: Tuple[int, int, Dict[str, Any]]) -> None:
+        """Save a turn, rebasing it onto the stored copy if only background work changed that.
+
+        Another worker's field merge or usage update doesn't invalidate the turn,
+        so its new messages and usage are replayed on top once. If a different
+        turn or a compaction landed instead, SessionConflictError propagates.
+        """
+        try:
+            await self.sessions.save(session_id, session)
+            return
+        except SessionConflictError:
+            current = await self.sessions.get(session_id)
+            base_length, base_offset, base_usage = base
+            if current is None or len(current["messages"]) != base_length or current.get("history_offset", 0) != base_offset:
+                raise
+        current["messages"].extend(session["messages"][base_length:])
+        add_usage(current["usage"], {k: v - base_usage.get(k, 0) for k, v in session["usage"].items()})
+        await self.sessions.save(session_id, current)
+
+    def _fields_event(self, session_id: str, session: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the fields payload shared by the stream and the fields endpoint"""
+        task = self._extraction_tasks.get(session_id)
+        return {
+            "session_id": session_id,
+            "fields": session["fields"],
+            "fields_version": session["fields_version"],
+            "extraction_pending": bool(task and not task.done()),
+            "gpt_type": session["gpt_type"],
+            "usage": session["usage"],
+            "is_complete": all(session["fields"].values())
+        }
+
+    def _model_for(self, gpt_type: str, role: str) -> str:
+        """Model to use for a call role, honoring per-GPT overrides in GPT_CONFIGS"""
+        gpt_config = GPT_CONFIGS.get(gpt_type, GPT_CONFIGS["offer_clarifier"])
+        return gpt_config.get("models", {}).get(role) or DEFAULT_MODEL_ROUTES.get(role, DEFAULT_MODEL_ROUTES["reply"])
+
+    async def _complete(self, session: Dict[str, Any], role: str, **kwargs):
+        """Run a chat completion for a session's call role and meter its token usage.
+
+        The model is routed by role unless given explicitly. Deterministic
+        requests (temperature=0) are answered from the completion cache when an
+        identical request was made before.
+        """
+        kwargs.setdefault("model", self._model_for(session["gpt_type"], role))
+        cache_key = self.cache.key_for(kwargs) if kwargs.get("temperature") == 0 else None
+        if cache_key:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return ChatCompletion.model_validate(cached)
+
+        prompt_tokens = count_message_tokens(kwargs["messages"], kwargs["model"])
+        slot = self.scheduler.slot(role, kwargs["model"], prompt_tokens + settings.UPSTREAM_COMPLETION_TOKEN_RESERVE)
+        async with slot as reserved, self.upstream.track():
+            response = await self.resilience.call(lambda: self.client.chat.completions.create(**kwargs))
+        if response.usage is not None:
+            self.limiter.settle(kwargs["model"], reserved, response.usage.total_tokens)
+        self.usage.record_response(session, role, response, kwargs["messages"], kwargs["model"])
+        if cache_key:
+            await self.cache.set(cache_key, response.model_dump())
+        return response
+
+    async def _complete_stream(self, session: Dict[str, Any], role: str, **kwargs) -> AsyncIterator[str]:
+        """Stream a chat completion's content deltas, metering usage with the local tokenizer"""
+        kwargs.setdefault("model", self._model_for(session["gpt_type"], role))
+        parts = []
+        prompt_tokens = count_message_tokens(kwargs["messages"], kwargs["model"])
+        slot = self.scheduler.slot(role, kwargs["model"], prompt_tokens + settings.UPSTREAM_COMPLETION_TOKEN_RESERVE)
+        async with slot as reserved, self.upstream.track():
+            # Only opening the stream is retried; once tokens flow a failure ends the reply
+            stream = await self.resilience.call(lambda: self.client.chat.completions.create(stream=True, **kwargs))
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+            finally:
+                # Streamed responses carry no usage block; count what was generated
+                completion_tokens = count_text_tokens("".join(parts), kwargs["model"])
+                self.limiter.settle(kwargs["model"], reserved, prompt_tokens + completion_tokens)
+                self.usage.record(session, role, prompt_tokens, completion_tokens, estimated=True)
+                # Hand the connection back even when the reply was abandoned mid-stream
+                await stream.response.aclose()
+
+    def _schedule_extraction(self, session_id: str, session: Dict[str, Any], exchange: List[Dict[str, Any]]) -> asyncio.Task:
+        """Run field extraction for the latest exchange as a background task"""
+        previous = self._extraction_tasks.get(session_id)
+        task = asyncio.create_task(self._run_extraction(session_id, session, exchange, previous), context=detached())
+        self._extraction_tasks[session_id] = task
+
+        def _forget(done: asyncio.Task) -> None:
+            if self._extraction_tasks.get(session_id) is done:
+                del self._extraction_tasks[session_id]
+
+        task.add_done_callback(_forget)
+        return task
+
+    def _schedule_compaction(self, session_id: str, session: Dict[str, Any]) -> None:
+        """Fold older turns into the rolling summary in the background once over budget"""
+        if session_id in self._compaction_tasks or not self.history.needs_compaction(session):
+            return
+        task = asyncio.create_task(self._run_compaction(session_id, session), context=detached())
+        self._compaction_tasks[session_id] = task
+        task.add_done_callback(lambda _: self._compaction_tasks.pop(session_id, None))
+
+    async def _run_compaction(self, session_id: str, session: Dict[str, Any]) -> None:
+        """Compact a session's history, keeping the full history if summarizing fails"""
+        try:
+            # Summarize unlocked on a snapshot; fold only if no other compaction moved the history meanwhile
+            snapshot = dict(await self.sessions.get(session_id) or session, usage=empty_usage())
+            result = await self.history.summarize(snapshot, self._complete)
+
+            def apply(current: Dict[str, Any]) -> None:
+                add_usage(current["usage"], snapshot["usage"])
+                if result and current.get("history_offset", 0) == snapshot.get("history_offset", 0):
+                    self.history.fold(current, *result)
+
+            await self._update_session(session_id, apply)
+        except Exception as e:
+            logger.warning("History compaction failed for %s: %s", session["gpt_type"], e)
+
+    async def _run_extraction(self, session_id: str, session: Dict[str, Any], exchange: List[Dict[str, Any]], previous: Optional[asyncio.Task]) -> None:
+        """Extract fields after any earlier extraction for the session has landed"""
+        if previous and not previous.done():
+            try:
+                await previous
+            except asyncio.CancelledError:
+                pass
+        # The upstream call runs unlocked on a snapshot; its result is merged into the latest stored copy
+        snapshot = dict(await self.sessions.get_meta(session_id) or session, usage=empty_usage())
+        exchange = self._deferred_exchanges.pop(session_id, []) + exchange
+        try:
+            extracted = await self._extract_fields(snapshot, exchange)
+        except Exception as e:
+            # If extraction fails, continue without it; an unavailable upstream gets another go next turn
+            logger.warning("Field extraction failed for %s: %s", snapshot["gpt_type"], e)
+            extracted = {}
+            if is_retryable(e) or isinstance(e, (CircuitOpenError, RateLimitExceeded)):
+                self._defer_exchange(session_id, exchange)
+
+        def apply(current: Dict[str, Any]) -> None:
+            add_usage(current["usage"], snapshot["usage"])
+            updated = False
+            for key, value in extracted.items():
+                if key in current["fields"] and not current["fields"][key]:
+                    current["fields"][key] = value
+                    updated = True
+            if updated:
+                current["fields_version"] += 1
+
+        await self._update_session(session_id, apply)
+
+    def _defer_exchange(self, session_id: str, exchange: List[Dict[str, Any]]) -> None:
+        """Keep an exchange whose extraction failed so the next extraction covers it too"""
+        self._deferred_exchanges[session_id] = exchange[-MAX_DEFERRED_MESSAGES:]
+        self._deferred_exchanges.move_to_end(session_id)
+        while len(self._deferred_exchanges) > MAX_DEFERRED_SESSIONS:
+            self._deferred_exchanges.popitem(last=False)
+
+    async def _update_session(self, session_id: str, apply) -> bool:
+        """Apply a background result to the latest stored copy of a session.
+
+        ``apply`` mutates the session in place. Runs under the session lock and
+        re-reads and re-applies if another process saved the session first.
+        Returns False if the session is gone.
+        """
+        async with self.locks.hold(session_id):
+            for _ in range(3):
+                current = await self.sessions.get(session_id)
+                if current is None:
+                    return False
+                apply(current)
+                try:
+                    await self.sessions.save(session_id, current)
+                    return True
+                except SessionConflictError:
+                    continue
+        logger.warning("Giving up on a background update for session %s after repeated conflicts", session_id)
+        return False
+
+    def _upstream_error_reply(self, error: Exception) -> str:
+        """User-facing reply for a failed upstream call; the details go to the log"""
+        if isinstance(error, CircuitOpenError):
+            return f"The assistant is temporarily unavailable. Please try again in {error.retry_after:.0f}s."
+        logger.warning("Upstream call failed: %s", error)
+        return "I couldn't generate a reply just now. Please try again in a moment."
+
+    @staticmethod
+    def _sse(event: str, data: Dict[str, Any]) -> str:
+        """Format a single Server-Sent Event"""
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
     def _get_greeting(self, gpt_type: str) -> str:
         """Get the initial greeting for a GPT type"""
         greetings = {
@@ -365,30 +931,47 @@ Would you like to continue with the remaining questions?"""
             "session_id": session_id, 
             "reply": summary_text,
             "fields": session["fields"],
+            "usage": session["usage"],
             "is_complete": all(session["fields"].values())
         }
     
-    def _handle_proceed_request(self, session_id: str, session: Dict[str, Any]) -> Dict[str, Any]:
+    async def _handle_proceed_request(self, session_id: str, session: Dict[str, Any]) -> Dict[str, Any]:
         """Handle proceed request"""
         missing_fields = [f for f, v in session["fields"].items() if not v]
         
         if missing_fields:
             # Add context to help the AI continue
+            nudge_at = len(session["messages"])
             session["messages"].append({"role": "system", "content": f"User wants to proceed. Missing fields: {missing_fields}. Ask the next logical question naturally."})
             
             # Get AI response for continuing
-            continue_resp = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=session["messages"],
-                temperature=0.8
-            )
+            try:
+                continue_resp = await self._complete(
+                    session, "proceed",
+                    messages=self.history.build_messages(session),
+                    temperature=0.8
+                )
+            except Exception as e:
+                # The nudge only makes sense next to the reply it asked for
+                del session["messages"][nudge_at:]
+                if isinstance(e, (RateLimitExceeded, DeadlineExceeded)):
+                    raise
+                return {
+                    "session_id": session_id,
+                    "reply": self._upstream_error_reply(e),
+                    "fields": session["fields"],
+                    "usage": session["usage"],
+                    "is_complete": False
+                }
             continue_reply = continue_resp.choices[0].message.content
             session["messages"].append({"role": "assistant", "content": continue_reply})
+            self._schedule_compaction(session_id, session)
             
             return {
                 "session_id": session_id,
                 "reply": continue_reply,
                 "fields": session["fields"],
+                "usage": session["usage"],
                 "is_complete": False
             }
         
@@ -396,103 +979,36 @@ Would you like to continue with the remaining questions?"""
             "session_id": session_id,
             "reply": "Great! We've covered all the key areas. Would you like me to generate a summary report?",
             "fields": session["fields"],
+            "usage": session["usage"],
             "is_complete": True
         }
     
-    def _extract_fields(self, session: Dict[str, Any]):
-        """Extract structured data from conversation using OpenAI"""
-        try:
-            # Create extraction prompt based on GPT type
-            if session["gpt_type"] == "offer_clarifier":
-                extraction_prompt = """Extract the following fields from the conversation below. Return ONLY valid JSON with null for missing fields:
-
-{
-  "product_name": "The name of the product/service/offer",
-  "core_transformation": "The main outcome or transformation customers get", 
-  "features": ["Key features or deliverables as array"],
-  "delivery_method": "How it's delivered (live, digital, coaching, etc.)",
-  "format": "What format it's in (course, membership, service, SaaS, etc.)",
-  "pricing": "Price or pricing model",
-  "unique_value": "What makes it different/unique (USP)",
-  "target_audience": "Who it's for/ideal customer",
-  "problems_solved": ["Problems it solves as array"]
-}
-
-Conversation:
-"""
-            elif session["gpt_type"] == "avatar_creator":
-                extraction_prompt = """Extract the following fields from the conversation below. Return ONLY valid JSON with null for missing fields:
-
-{
-  "customer_segment": "Who is their ideal customer",
-  "avatar_name": "The name given to the avatar",
-  "demographics": "Age, job, income, location, family, lifestyle details",
-  "frustrations_fears": "Problems they face, what keeps them up at night",
-  "wants_aspirations": "Dreams, goals, what they're working toward, values",
-  "purchase_drivers": "What makes them say yes, what they value most",
-  "objections": "What might stop them from buying, concerns, hesitations",
-  "decision_making": "How they make decisions, who influences them",
-  "before_state": "Life before the solution, how they feel, struggles",
-  "after_state": "Life after using the solution, improvements, new feelings",
-  "emotional_shift": "Emotional transformation from negative to positive"
-}
-
-Conversation:
-"""
-            elif session["gpt_type"] == "before_state_research":
-                extraction_prompt = """Extract the following fields from the conversation below. Return ONLY valid JSON with null for missing fields:
-
-{
-  "avatar_input": "The original customer avatar data provided",
-  "what_they_have": "What unwanted or frustrating things they have in their life right now",
-  "how_they_feel": "How they feel emotionally - frustrated, overwhelmed, lost, anxious, etc.",
-  "average_day": "What their typical day looks like and where struggles show up",
-  "status": "How they feel about themselves or how others see them",
-  "evil_they_face": "What they think is the cause of the problem or root cause they're fighting",
-  "research_communities": "Online communities where people talk about this situation",
-  "emotional_patterns": "Patterns in emotions and struggles found in research",
-  "before_state_narrative": "Complete before state story in narrative format",
-  "empathy_map": "Empathy map summary of their before state"
-}
-
-Conversation:
-"""
-            else:
-                # Generic extraction for other GPT types
-                extraction_prompt = """Extract relevant information from the conversation below. Return ONLY valid JSON with the fields that are mentioned:
+    async def _extract_fields(self, session: Dict[str, Any], exchange: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Extract structured data from the latest exchange using OpenAI.
 
-{
-  "extracted_data": "Any relevant information found in the conversation"
-}
+        Only the newest user/assistant exchange (plus any whose extraction
+        failed earlier) is sent, and only fields that are still missing are
+        requested. Returns the newly found field values; upstream errors propagate.
+        """
+        missing_fields = [f for f, v in session["fields"].items() if not v]
+        if not missing_fields or not exchange:
+            return {}
+
+        conversation_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in exchange])
+        # Schema of the still-missing fields, built from GPT_CONFIGS
+        extraction_response = await self._complete(
+            session, "extraction",
+            messages=[
+                {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Latest exchange:\n{conversation_text}"}
+            ],
+            tools=[build_extraction_tool(session["gpt_type"], missing_fields)],
+            tool_choice=extraction_tool_choice(),
+            temperature=0
+        )
+        extracted_data = parse_extraction(extraction_response.choices[0].message)
 
-Conversation:
-"""
-            
-            # Get last few messages for context
-            recent_messages = session["messages"][-6:]  # Last 6 messages
-            conversation_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in recent_messages])
-            
-            extraction_response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a strict JSON data extractor. Extract only the fields mentioned in the conversation. Be conservative - only extract if clearly stated."},
-                    {"role": "user", "content": extraction_prompt + conversation_text}
-                ],
-                temperature=0
-            )
-            
-            try:
-                extracted_data = json.loads(extraction_response.choices[0].message.content)
-                # Update session fields with extracted data
-                for key in session["fields"]:
-                    if extracted_data.get(key) and not session["fields"][key]:
-                        session["fields"][key] = extracted_data[key]
-            except json.JSONDecodeError:
-                pass  # Continue without extraction if JSON parsing fails
-                
-        except Exception as e:
-            # If extraction fails, continue without it
-            pass
+        return {key: extracted_data[key] for key in missing_fields if extracted_data.get(key)}
     
     def _generate_final_report(self, fields_data: Dict[str, Any], gpt_type: str) -> str:
         """Generate final report based on GPT type"""
@@ -962,15 +1478,16 @@ Your offer is now clearly defined and ready for the next GPT assistants to:
         
         return report
     
-    def _collect_session_data(self, session_ids: list) -> Dict[str, Any]:
+    async def _collect_session_data(self, session_ids: list) -> Dict[str, Any]:
         """Collect data from multiple sessions"""
         combined_data = {
             "sessions_found": []
         }
         
-        for session_id in session_ids:
-            if session_id in self.sessions:
-                session = self.sessions[session_id]
+        # Only gpt_type and fields are needed, so the message logs are never loaded
+        sessions = await asyncio.gather(*[self.sessions.get_meta(session_id) for session_id in session_ids])
+        for session_id, session in zip(session_ids, sessions):
+            if session is not None:
                 combined_data["sessions_found"].append({
                     "session_id": session_id,
                     "gpt_type": session.get("gpt_type", "offer_clarifier"),
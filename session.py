@@ -0,0 +1,184 @@
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Support running both as a package and as a standalone script
+try:
+    from .usage import empty_usage  # type: ignore
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    from usage import empty_usage  # type: ignore
+
+
+# One shared {"role": "system", ...} message per distinct system prompt
+_SYSTEM_MESSAGES: Dict[str, Dict[str, str]] = {}
+
+
+def system_message(prompt: str) -> Dict[str, str]:
+    """The shared system message for ``prompt``; treat it as read-only"""
+    message = _SYSTEM_MESSAGES.get(prompt)
+    if message is None:
+        prompt = sys.intern(prompt)
+        message = _SYSTEM_MESSAGES[prompt] = {"role": "system", "content": prompt}
+    return message
+
+
+def session_meta(session) -> Dict[str, Any]:
+    """The metadata record of a session: everything except the message log"""
+    return {key: value for key, value in session.items() if key != "messages"}
+
+
+# Rough per-object costs used by approximate_size (CPython, 64-bit)
+SESSION_OVERHEAD_BYTES = 1200
+MESSAGE_OVERHEAD_BYTES = 120
+
+
+def approximate_size(session) -> int:
+    """Approximate resident bytes of a session: fixed overheads plus its text"""
+    messages = session["messages"]
+    size = SESSION_OVERHEAD_BYTES + len(session.get("summary") or "") + MESSAGE_OVERHEAD_BYTES * (len(messages) - 1)
+    if isinstance(messages, MessageLog):
+        size += messages.text_length()
+    else:
+        size += sum(len(message["content"] or "") for message in messages[1:])
+    for value in session["fields"].values():
+        if value:
+            size += len(value) if isinstance(value, str) else len(str(value))
+    return size
+
+
+class MessageLog:
+    """Conversation messages of a session, used like a list of message dicts.
+
+    Index 0 is the session's system prompt, shared with every other session
+    that uses the same prompt. The history after it is stored as
+    ``(role, content)`` tuples; message dicts are built on access, so edit the
+    log through ``append``/``extend``/``del`` rather than the returned dicts.
+    """
+
+    __slots__ = ("system", "_entries")
+
+    def __init__(self, messages: Iterable[Dict[str, Any]] = ()):
+        messages = iter(messages)
+        first = next(messages, None)
+        self.system = system_message(first["content"] if first else "")
+        self._entries: List[Tuple[str, str]] = []
+        self.extend(messages)
+
+    def append(self, message: Dict[str, Any]) -> None:
+        self._entries.append((sys.intern(message["role"]), message["content"]))
+
+    def extend(self, messages: Iterable[Dict[str, Any]]) -> None:
+        for message in messages:
+            self.append(message)
+
+    def __len__(self) -> int:
+        return len(self._entries) + 1
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        yield self.system
+        for role, content in self._entries:
+            yield {"role": role, "content": content}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.start is None or index.start < 1:
+                return list(self)[index]
+            return [{"role": role, "content": content} for role, content in self._entries[self._history_slice(index)]]
+        if index < 0:
+            index += len(self)
+        if index == 0:
+            return self.system
+        if not 0 < index < len(self):
+            raise IndexError("message index out of range")
+        role, content = self._entries[index - 1]
+        return {"role": role, "content": content}
+
+    def __delitem__(self, index) -> None:
+        if not isinstance(index, slice) or index.start is None or index.start < 1:
+            raise TypeError("only history slices (starting at 1) can be deleted")
+        del self._entries[self._history_slice(index)]
+
+    def text_length(self) -> int:
+        """Total length of the history contents"""
+        return sum(len(content or "") for _, content in self._entries)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"MessageLog({list(self)!r})"
+
+    @staticmethod
+    def _history_slice(index: slice) -> slice:
+        """Translate a slice over the log (start >= 1) to one over the history entries"""
+        stop = index.stop
+        if stop is not None and stop > 0:
+            stop -= 1
+        return slice(index.start - 1, stop, index.step)
+
+
+class Session:
+    """State of one conversation.
+
+    Slotted to keep the per-session footprint small; supports the dict-style
+    access (``session["fields"]``, ``get``, ``items``) the service and stores
+    use, and ``dict(session)`` gives a plain dict.
+    """
+
+    __slots__ = (
+        "gpt_type", "messages", "fields", "fields_version", "summary",
+        "history_offset", "version", "usage", "current_question"
+    )
+
+    def __init__(self, gpt_type: str, system_prompt: str, field_names: Iterable[str]):
+        self.gpt_type = gpt_type
+        self.messages = MessageLog([{"role": "system", "content": system_prompt}])
+        self.fields: Dict[str, Any] = dict.fromkeys(field_names)
+        self.fields_version = 0
+        self.summary: Optional[str] = None
+        self.history_offset = 0
+        self.version = 0
+        self.usage = empty_usage()
+        self.current_question = 0  # Track which question we're on
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Session":
+        """Rebuild a session from its stored form, ignoring unknown keys"""
+        session = cls.__new__(cls)
+        session.gpt_type = data.get("gpt_type", "offer_clarifier")
+        session.messages = MessageLog(data.get("messages", ()))
+        session.fields = data.get("fields", {})
+        session.fields_version = data.get("fields_version", 0)
+        session.summary = data.get("summary")
+        session.history_offset = data.get("history_offset", 0)
+        session.version = data.get("version", 0)
+        # Counters added since the session was stored start at zero
+        session.usage = dict(empty_usage(), **(data.get("usage") or {}))
+        session.current_question = data.get("current_question", 0)
+        return session
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        if key == "messages" and not isinstance(value, MessageLog):
+            value = MessageLog(value)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        return self[key]
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return ((key, getattr(self, key)) for key in self.__slots__)
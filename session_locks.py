@@ -0,0 +1,32 @@
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class SessionLocks:
+    """One asyncio lock per session, created on demand.
+
+    Locks are held in a weak-value map, so a session's lock disappears as soon
+    as no turn holds or waits on it; there is no global lock and no cleanup.
+    """
+
+    def __init__(self):
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.contended = 0
+
+    @asynccontextmanager
+    async def hold(self, session_id: str) -> AsyncIterator[None]:
+        """Serialize work on ``session_id`` with any other holder"""
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[session_id] = lock
+        if lock.locked():
+            self.contended += 1
+        async with lock:
+            yield
+
+    def stats(self) -> dict:
+        """Lock counters"""
+        return {"active": len(self._locks), "contended": self.contended}
@@ -0,0 +1,896 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from typing import Dict, Any, AsyncIterator, Optional, Tuple
+
+# Support running both as a package and as a standalone script
+try:
+    from . import settings  # type: ignore
+    from .session import Session, approximate_size, session_meta  # type: ignore
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    import settings  # type: ignore
+    from session import Session, approximate_size, session_meta  # type: ignore
+
+# redis is only needed for SESSION_BACKEND=redis
+try:
+    import redis.asyncio as aioredis  # type: ignore
+    from redis.exceptions import WatchError  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    aioredis = None
+
+    class WatchError(Exception):  # type: ignore
+        pass
+
+logger = logging.getLogger(__name__)
+
+
+class SessionConflictError(Exception):
+    """A session was saved by another writer since this copy was read"""
+
+    def __init__(self, session_id: str):
+        super().__init__(f"Session {session_id} was modified concurrently; reload and retry")
+        self.session_id = session_id
+
+
+class SessionStore(ABC):
+    """Storage for conversation sessions.
+
+    Sessions are ``Session`` objects (or plain dicts) accessed dict-style.
+    Callers mutate the session returned by ``get`` and call ``save`` to
+    persist the changes. Reads that don't need the history use ``get_meta``,
+    which backends answer without loading the message log. Every save bumps ``session["version"]``;
+    saving a copy older than the stored one raises SessionConflictError.
+    """
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the session, or None if it doesn't exist or has expired"""
+
+    async def get_meta(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the session's metadata record (gpt_type, fields, usage, ...) for reading only.
+
+        The result may be the live session; never mutate it or pass it to ``save``.
+        """
+        return await self.get(session_id)
+
+    @abstractmethod
+    async def save(self, session_id: str, session: Dict[str, Any], replace: bool = False) -> None:
+        """Create or update a session, checking its version against the stored one.
+
+        With ``replace`` the session is written in full, dropping whatever was
+        stored under its id, instead of only the changes since the last save.
+        """
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> bool:
+        """Remove a session; returns True if it existed"""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of stored sessions"""
+
+    @abstractmethod
+    async def count_by_type(self) -> Dict[str, int]:
+        """Number of stored sessions per gpt_type"""
+
+    def resident_bytes(self) -> int:
+        """Approximate bytes of session data held in this process"""
+        return 0
+
+    async def sweep(self, limit: int) -> int:
+        """Evict up to ``limit`` expired sessions; returns how many were evicted"""
+        return 0
+
+    @abstractmethod
+    def scan(self, batch_size: int = 100) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (session_id, session) for every live session, loading ``batch_size`` at a time.
+
+        Sessions are read for export only and are not pulled into any cache.
+        """
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend counters for monitoring"""
+        return {}
+
+    async def close(self) -> None:
+        """Release backend resources"""
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store with a session cap (LRU eviction) and an idle TTL.
+
+    With a ``memory_limit`` (bytes), a governor tracks the approximate size of
+    every resident session and spills the least recently used ones to
+    zlib-compressed files in ``spill_dir`` until the total fits again. Spilled
+    sessions are read back transparently by the next ``get``.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 86400, memory_limit: int = 0, spill_dir: str = "session_spill"):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        # session_id -> (last_access, session), least recently used first
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        # session_id -> approximate resident bytes
+        self._sizes: Dict[str, int] = {}
+        self._resident_bytes = 0
+        # session_id -> gpt_type of every stored session, resident or spilled
+        self._types: Dict[str, str] = {}
+        # session_id -> last_access of sessions on disk, least recently used first
+        self._spilled: "OrderedDict[str, float]" = OrderedDict()
+        # Sessions whose spill file is being written; still served from memory
+        self._spilling: Dict[str, tuple] = {}
+        self.capacity_evictions = 0
+        self.expired_evictions = 0
+        self.spills = 0
+        self.rehydrations = 0
+        if memory_limit:
+            os.makedirs(spill_dir, exist_ok=True)
+            # Spill files only mean something to the process that wrote them
+            for name in os.listdir(spill_dir):
+                if name.endswith(".zlib"):
+                    os.remove(os.path.join(spill_dir, name))
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._sessions.get(session_id) or self._spilling.get(session_id)
+        if entry is None:
+            if session_id not in self._spilled:
+                return None
+            entry = (self._spilled[session_id], None)
+        last_access, session = entry
+        now = time.monotonic()
+        if now - last_access > self.ttl_seconds:
+            await self.delete(session_id)
+            self.expired_evictions += 1
+            return None
+        if session is None:
+            session = await asyncio.to_thread(self._read_spill, session_id)
+            if session is None or session_id not in self._spilled:
+                # Deleted or saved again while the file was read
+                return (self._sessions.get(session_id) or (None, None))[1]
+            del self._spilled[session_id]
+            self.rehydrations += 1
+            await asyncio.to_thread(self._remove_spill, session_id)
+        self._spilling.pop(session_id, None)
+        self._resident(session_id, now, session)
+        await self._relieve_pressure()
+        return session
+
+    async def get_meta(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if session_id not in self._spilled:
+            return await self.get(session_id)
+        if time.monotonic() - self._spilled[session_id] > self.ttl_seconds:
+            return await self.get(session_id)
+        # Read a spilled session without bringing it back into memory
+        session = await asyncio.to_thread(self._read_spill, session_id)
+        return session_meta(session) if session is not None else await self.get(session_id)
+
+    async def save(self, session_id: str, session: Dict[str, Any], replace: bool = False) -> None:
+        entry = self._sessions.get(session_id) or self._spilling.get(session_id)
+        _check_version(session_id, entry[1] if entry else None, session)
+        session["version"] = session.get("version", 0) + 1
+        self._spilling.pop(session_id, None)
+        if self._spilled.pop(session_id, None) is not None:
+            await asyncio.to_thread(self._remove_spill, session_id)
+        self._resident(session_id, time.monotonic(), session)
+        self._types[session_id] = session.get("gpt_type")
+        while len(self._sessions) + len(self._spilled) > self.max_sessions:
+            if self._spilled:
+                evicted_id, _ = self._spilled.popitem(last=False)
+                await asyncio.to_thread(self._remove_spill, evicted_id)
+            else:
+                evicted_id, _ = self._sessions.popitem(last=False)
+                self._resident_bytes -= self._sizes.pop(evicted_id, 0)
+            self._types.pop(evicted_id, None)
+            self.capacity_evictions += 1
+        await self._relieve_pressure()
+
+    async def delete(self, session_id: str) -> bool:
+        existed = self._sessions.pop(session_id, None) is not None
+        self._resident_bytes -= self._sizes.pop(session_id, 0)
+        self._types.pop(session_id, None)
+        existed = self._spilling.pop(session_id, None) is not None or existed
+        if self._spilled.pop(session_id, None) is not None:
+            await asyncio.to_thread(self._remove_spill, session_id)
+            existed = True
+        return existed
+
+    async def count(self) -> int:
+        return len(self._sessions) + len(self._spilling) + len(self._spilled)
+
+    async def count_by_type(self) -> Dict[str, int]:
+        return dict(Counter(self._types.values()))
+
+    def resident_bytes(self) -> int:
+        return self._resident_bytes
+
+    async def scan(self, batch_size: int = 100) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        cutoff = time.monotonic() - self.ttl_seconds
+        for session_id in list(self._sessions) + list(self._spilling) + list(self._spilled):
+            entry = self._sessions.get(session_id) or self._spilling.get(session_id)
+            if entry is not None:
+                if entry[0] >= cutoff:
+                    yield session_id, entry[1]
+                continue
+            last_access = self._spilled.get(session_id)
+            if last_access is not None and last_access >= cutoff:
+                # Read straight from the spill file, leaving the session on disk
+                session = await asyncio.to_thread(self._read_spill, session_id)
+                if session is not None:
+                    yield session_id, session
+
+    async def sweep(self, limit: int) -> int:
+        # Both maps are ordered by last access, so expired sessions sit at the front
+        cutoff = time.monotonic() - self.ttl_seconds
+        swept = 0
+        while swept < limit and self._sessions:
+            session_id, (last_access, _) = next(iter(self._sessions.items()))
+            if last_access >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            self._resident_bytes -= self._sizes.pop(session_id, 0)
+            self._types.pop(session_id, None)
+            swept += 1
+        expired_spills = []
+        while swept < limit and self._spilled:
+            session_id, last_access = next(iter(self._spilled.items()))
+            if last_access >= cutoff:
+                break
+            self._spilled.popitem(last=False)
+            self._types.pop(session_id, None)
+            expired_spills.append(session_id)
+            swept += 1
+        if expired_spills:
+            await asyncio.to_thread(lambda: [self._remove_spill(session_id) for session_id in expired_spills])
+        self.expired_evictions += swept
+        return swept
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "sessions": len(self._sessions) + len(self._spilling) + len(self._spilled),
+            "resident_sessions": len(self._sessions),
+            "resident_bytes": self._resident_bytes,
+            "memory_limit_bytes": self.memory_limit,
+            "spilled_sessions": len(self._spilled),
+            "spills": self.spills,
+            "rehydrations": self.rehydrations,
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "capacity_evictions": self.capacity_evictions,
+            "expired_evictions": self.expired_evictions
+        }
+
+    def _resident(self, session_id: str, last_access: float, session: Dict[str, Any]) -> None:
+        self._sessions[session_id] = (last_access, session)
+        self._sessions.move_to_end(session_id)
+        size = approximate_size(session)
+        self._resident_bytes += size - self._sizes.get(session_id, 0)
+        self._sizes[session_id] = size
+
+    async def _relieve_pressure(self) -> None:
+        """Spill least recently used sessions until resident sessions fit the memory limit"""
+        if not self.memory_limit:
+            return
+        # Always keep the most recently used session in memory
+        while self._resident_bytes > self.memory_limit and len(self._sessions) > 1:
+            session_id, entry = self._sessions.popitem(last=False)
+            self._resident_bytes -= self._sizes.pop(session_id, 0)
+            self._spilling[session_id] = entry
+            try:
+                await asyncio.to_thread(self._write_spill, session_id, entry[1])
+            except OSError as e:
+                logger.warning("Could not spill session %s to disk: %s", session_id, e)
+                if self._spilling.pop(session_id, None) is not None:
+                    self._resident(session_id, *entry)
+                return
+            if self._spilling.pop(session_id, None) is None:
+                # Read, saved or deleted while the file was written
+                await asyncio.to_thread(self._remove_spill, session_id)
+                continue
+            self._spilled[session_id] = entry[0]
+            self.spills += 1
+
+    def _spill_path(self, session_id: str) -> str:
+        # Session ids come from clients; never use them as file names directly
+        return os.path.join(self.spill_dir, hashlib.sha256(session_id.encode("utf-8")).hexdigest() + ".zlib")
+
+    def _write_spill(self, session_id: str, session: Dict[str, Any]) -> None:
+        data = dict(session)
+        data["messages"] = list(session["messages"])
+        payload = zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        # Write then rename so a crash never leaves a partial file behind
+        tmp_path = self._spill_path(session_id) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, self._spill_path(session_id))
+
+    def _read_spill(self, session_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._spill_path(session_id), "rb") as f:
+                return Session.from_dict(json.loads(zlib.decompress(f.read())))
+        except (OSError, ValueError, zlib.error) as e:
+            logger.warning("Could not read spilled session %s: %s", session_id, e)
+            return None
+
+    def _remove_spill(self, session_id: str) -> None:
+        try:
+            os.remove(self._spill_path(session_id))
+        except FileNotFoundError:
+            pass
+
+
+class SQLiteSessionStore(SessionStore):
+    """Durable store on SQLite (WAL mode) with write-behind batching.
+
+    Live sessions are served from an in-process LRU cache. ``save`` only
+    snapshots what changed (new messages, fields and metadata) onto a queue
+    that a background flusher writes in one transaction per batch, so a chat
+    turn never waits on a disk sync. Messages are stored by absolute position
+    (``history_offset`` + index) so appends after compaction stay incremental.
+    Intended for a single process; use a networked backend for several workers.
+    """
+
+    def __init__(self, path: str, max_sessions: int = 10000, ttl_seconds: float = 86400, flush_interval: float = 0.2, max_batch: int = 500):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        # session_id -> session, least recently used first
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # session_id -> approximate bytes of cached sessions
+        self._sizes: Dict[str, int] = {}
+        self._cached_bytes = 0
+        # session_id -> (history_offset, absolute position of the next message to persist)
+        self._persisted: Dict[str, tuple] = {}
+        self._pending: list = []
+        self._pending_ids: set = set()
+        self._db_lock = threading.Lock()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self.batches_flushed = 0
+        self.ops_flushed = 0
+        self.largest_batch = 0
+        self.expired_evictions = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints; a crash can lose the last batch but never corrupts
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, gpt_type TEXT, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL, "
+            "PRIMARY KEY (session_id, seq))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session = self._cache.get(session_id)
+        if session is not None:
+            self._cache.move_to_end(session_id)
+            return session
+
+        if session_id in self._pending_ids:
+            await self.flush()
+        row = await asyncio.to_thread(self._load, session_id)
+        if row is None:
+            return None
+        updated_at, session = row
+        if time.time() - updated_at > self.ttl_seconds:
+            self.expired_evictions += 1
+            await self.delete(session_id)
+            return None
+        offset = session.get("history_offset", 0)
+        self._persisted[session_id] = (offset, offset + len(session["messages"]))
+        self._remember(session_id, session)
+        return session
+
+    async def get_meta(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session = self._cache.get(session_id)
+        if session is not None:
+            return session
+        if session_id in self._pending_ids:
+            await self.flush()
+        row = await asyncio.to_thread(self._load_meta, session_id)
+        if row is None or time.time() - row[0] > self.ttl_seconds:
+            return None
+        return row[1]
+
+    async def save(self, session_id: str, session: Dict[str, Any], replace: bool = False) -> None:
+        _check_version(session_id, self._cache.get(session_id), session)
+        session["version"] = session.get("version", 0) + 1
+        self._remember(session_id, session)
+
+        offset = session.get("history_offset", 0)
+        if replace:
+            # Rows written under the id before are dropped and every message is written anew
+            self._persisted.pop(session_id, None)
+            self._enqueue(("delete", session_id))
+        persisted_offset, next_seq = self._persisted.get(session_id, (0, 0))
+        messages = session["messages"]
+        new_messages = [
+            (seq, msg["role"], msg["content"] or "")
+            for seq, msg in self._numbered(messages, offset)
+            if seq >= next_seq
+        ]
+        data = session_meta(session)
+        self._persisted[session_id] = (offset, offset + len(messages))
+        self._enqueue((
+            "upsert", session_id, session.get("gpt_type"), json.dumps(data), time.time(),
+            # Messages folded into the summary since the last save are dropped from disk
+            (persisted_offset + 1, offset) if offset > persisted_offset else None,
+            new_messages
+        ))
+
+    async def delete(self, session_id: str) -> bool:
+        existed = self._uncache(session_id)
+        self._enqueue(("delete", session_id))
+        return existed or await asyncio.to_thread(self._exists, session_id)
+
+    async def count(self) -> int:
+        await self.flush()
+        return await asyncio.to_thread(self._count)
+
+    async def count_by_type(self) -> Dict[str, int]:
+        await self.flush()
+        return await asyncio.to_thread(self._count_by_type)
+
+    def resident_bytes(self) -> int:
+        return self._cached_bytes
+
+    async def scan(self, batch_size: int = 100) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        await self.flush()
+        after = ""
+        while True:
+            page = await asyncio.to_thread(self._load_page, after, time.time() - self.ttl_seconds, batch_size)
+            for session_id, session in page:
+                # Live sessions may have changes that aren't flushed yet
+                yield session_id, self._cache.get(session_id) or session
+            if len(page) < batch_size:
+                return
+            after = page[-1][0]
+
+    async def sweep(self, limit: int) -> int:
+        await self.flush()
+        expired = await asyncio.to_thread(self._expired_ids, time.time() - self.ttl_seconds, limit)
+        for session_id in expired:
+            self._uncache(session_id)
+            self._enqueue(("delete", session_id))
+        self.expired_evictions += len(expired)
+        return len(expired)
+
+    async def flush(self) -> None:
+        """Write all queued changes in one transaction"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            while self._pending:
+                ops, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                await asyncio.to_thread(self._write_batch, ops)
+                self.batches_flushed += 1
+                self.ops_flushed += len(ops)
+                self.largest_batch = max(self.largest_batch, len(ops))
+            self._pending_ids.clear()
+
+    async def close(self) -> None:
+        if self._flusher:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "cached_sessions": len(self._cache),
+            "cached_bytes": self._cached_bytes,
+            "pending_writes": len(self._pending),
+            "batches_flushed": self.batches_flushed,
+            "ops_flushed": self.ops_flushed,
+            "largest_batch": self.largest_batch,
+            "expired_evictions": self.expired_evictions
+        }
+
+    @staticmethod
+    def _numbered(messages: list, offset: int):
+        """(absolute position, message) pairs; the system prompt is always position 0"""
+        for index, msg in enumerate(messages):
+            yield (0 if index == 0 else offset + index), msg
+
+    def _remember(self, session_id: str, session: Dict[str, Any]) -> None:
+        self._cache[session_id] = session
+        self._cache.move_to_end(session_id)
+        size = approximate_size(session)
+        self._cached_bytes += size - self._sizes.get(session_id, 0)
+        self._sizes[session_id] = size
+        while len(self._cache) > self.max_sessions:
+            evicted_id, _ = self._cache.popitem(last=False)
+            self._persisted.pop(evicted_id, None)
+            self._cached_bytes -= self._sizes.pop(evicted_id, 0)
+
+    def _uncache(self, session_id: str) -> bool:
+        """Drop a session from the cache; returns True if it was cached"""
+        self._persisted.pop(session_id, None)
+        self._cached_bytes -= self._sizes.pop(session_id, 0)
+        return self._cache.pop(session_id, None) is not None
+
+    def _enqueue(self, op: tuple) -> None:
+        self._pending.append(op)
+        self._pending_ids.add(op[1])
+        if self._flusher is None or self._flusher.done():
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.create_task(self._flush_loop())
+        self._wakeup.set()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            # Let writes from concurrent turns accumulate into one batch
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Session write-behind flush failed: %s", e)
+
+    def _write_batch(self, ops: list) -> None:
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            try:
+                for op in ops:
+                    if op[0] == "delete":
+                        self._conn.execute("DELETE FROM messages WHERE session_id = ?", (op[1],))
+                        self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (op[1],))
+                        continue
+                    _, session_id, gpt_type, data, updated_at, folded, new_messages = op
+                    self._conn.execute(
+                        "INSERT INTO sessions (session_id, gpt_type, data, updated_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(session_id) DO UPDATE SET gpt_type = excluded.gpt_type, "
+                        "data = excluded.data, updated_at = excluded.updated_at",
+                        (session_id, gpt_type, data, updated_at)
+                    )
+                    if folded:
+                        self._conn.execute(
+                            "DELETE FROM messages WHERE session_id = ? AND seq BETWEEN ? AND ?",
+                            (session_id, folded[0], folded[1])
+                        )
+                    if new_messages:
+                        self._conn.executemany(
+                            "INSERT OR REPLACE INTO messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                            [(session_id, seq, role, content) for seq, role, content in new_messages]
+                        )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _load(self, session_id: str) -> Optional[tuple]:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT data, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            messages = self._conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        data = json.loads(row[0])
+        data["messages"] = [{"role": role, "content": content} for role, content in messages]
+        return row[1], Session.from_dict(data)
+
+    def _load_page(self, after: str, cutoff: float, limit: int) -> list:
+        with self._db_lock:
+            ids = [row[0] for row in self._conn.execute(
+                "SELECT session_id FROM sessions WHERE session_id > ? AND updated_at >= ? ORDER BY session_id LIMIT ?",
+                (after, cutoff, limit)
+            )]
+        page = []
+        for session_id in ids:
+            row = self._load(session_id)
+            if row is not None:
+                page.append((session_id, row[1]))
+        return page
+
+    def _load_meta(self, session_id: str) -> Optional[tuple]:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT data, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return None if row is None else (row[1], json.loads(row[0]))
+
+    def _exists(self, session_id: str) -> bool:
+        with self._db_lock:
+            return self._conn.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone() is not None
+
+    def _count(self) -> int:
+        with self._db_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def _count_by_type(self) -> Dict[str, int]:
+        with self._db_lock:
+            return dict(self._conn.execute("SELECT gpt_type, COUNT(*) FROM sessions GROUP BY gpt_type").fetchall())
+
+    def _expired_ids(self, cutoff: float, limit: int) -> list:
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT session_id FROM sessions WHERE updated_at < ? ORDER BY updated_at LIMIT ?", (cutoff, limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+class RedisSessionStore(SessionStore):
+    """Networked store on Redis (or any server speaking the Redis protocol).
+
+    Every worker and replica sees the same sessions, so uvicorn can run with
+    several workers. Each session is a metadata record (``session:<id>``, JSON
+    without the messages), a list of history messages (``messages:<id>``, the
+    system prompt stays in the record) and an entry in a sorted index scored by
+    last write time. Keys carry the idle TTL natively.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "eureka:", ttl_seconds: float = 86400, client=None, max_tracked: int = 10000):
+        if client is None:
+            if aioredis is None:
+                raise RuntimeError("SESSION_BACKEND=redis requires the 'redis' package")
+            client = aioredis.from_url(url, decode_responses=True)
+        self.client = client
+        self.url = url
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.max_tracked = max_tracked
+        # session_id -> (history_offset, stored history length) as last written by this process
+        self._stored: "OrderedDict[str, tuple]" = OrderedDict()
+        self.reads = 0
+        self.meta_reads = 0
+        self.writes = 0
+        self.full_rewrites = 0
+        self.conflicts = 0
+        self.expired_evictions = 0
+
+    def _meta_key(self, session_id: str) -> str:
+        return f"{self.prefix}session:{session_id}"
+
+    def _messages_key(self, session_id: str) -> str:
+        return f"{self.prefix}messages:{session_id}"
+
+    @property
+    def _index_key(self) -> str:
+        return f"{self.prefix}sessions"
+
+    def _type_index_key(self, gpt_type: str) -> str:
+        return f"{self.prefix}sessions:{gpt_type}"
+
+    @property
+    def _types_key(self) -> str:
+        return f"{self.prefix}session_types"
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.get(self._meta_key(session_id))
+            pipe.lrange(self._messages_key(session_id), 0, -1)
+            meta, history = await pipe.execute()
+        self.reads += 1
+        if meta is None:
+            return None
+        session = self._decode(meta, history)
+        self._track(session_id, (session.get("history_offset", 0), len(history)))
+        return session
+
+    @staticmethod
+    def _decode(meta: str, history: list) -> Session:
+        data = json.loads(meta)
+        system_prompt = data.pop("system_prompt", None)
+        data["messages"] = [{"role": "system", "content": system_prompt}] + [json.loads(m) for m in history]
+        return Session.from_dict(data)
+
+    async def get_meta(self, session_id: str) -> Optional[Dict[str, Any]]:
+        meta = await self.client.get(self._meta_key(session_id))
+        self.meta_reads += 1
+        if meta is None:
+            return None
+        data = json.loads(meta)
+        data.pop("system_prompt", None)
+        return data
+
+    async def save(self, session_id: str, session: Dict[str, Any], replace: bool = False) -> None:
+        offset = session.get("history_offset", 0)
+        history = session["messages"][1:]
+        version = session.get("version", 0)
+        data = session_meta(session)
+        data["system_prompt"] = session["messages"][0]["content"]
+        data["version"] = version + 1
+        ttl = int(self.ttl_seconds)
+        meta_key = self._meta_key(session_id)
+
+        stored = None if replace else self._stored.get(session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            # Compare-and-set on the record's version: WATCH aborts the MULTI if
+            # another worker writes the session between the check and EXEC
+            await pipe.watch(meta_key)
+            current = await pipe.get(meta_key)
+            current = json.loads(current) if current is not None else None
+            if current is not None and current.get("version", 0) != version:
+                self.conflicts += 1
+                raise SessionConflictError(session_id)
+            pipe.multi()
+            previous_type = current.get("gpt_type") if current is not None else None
+            if previous_type is not None and previous_type != session.get("gpt_type"):
+                # The session changed type (e.g. replaced by an import): leave the old type's index
+                pipe.zrem(self._type_index_key(previous_type), session_id)
+            pipe.set(meta_key, json.dumps(data), ex=ttl)
+            messages_key = self._messages_key(session_id)
+            if stored is not None and stored[0] <= offset:
+                folded = offset - stored[0]
+                if folded:
+                    # Drop messages folded into the summary since the last write
+                    pipe.ltrim(messages_key, folded, -1)
+                new_messages = history[max(stored[1] - folded, 0):]
+            else:
+                # Unknown to this process, or replaced: rewrite the history
+                pipe.delete(messages_key)
+                new_messages = history
+                self.full_rewrites += 1
+            if new_messages:
+                pipe.rpush(messages_key, *[json.dumps(m) for m in new_messages])
+            pipe.expire(messages_key, ttl)
+            now = time.time()
+            pipe.zadd(self._index_key, {session_id: now})
+            pipe.zadd(self._type_index_key(session.get("gpt_type")), {session_id: now})
+            pipe.sadd(self._types_key, session.get("gpt_type"))
+            try:
+                await pipe.execute()
+            except WatchError:
+                self.conflicts += 1
+                raise SessionConflictError(session_id)
+        session["version"] = version + 1
+        self.writes += 1
+        self._track(session_id, (offset, len(history)))
+
+    async def delete(self, session_id: str) -> bool:
+        self._stored.pop(session_id, None)
+        gpt_types = await self.client.smembers(self._types_key)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(self._meta_key(session_id), self._messages_key(session_id))
+            pipe.zrem(self._index_key, session_id)
+            for gpt_type in gpt_types:
+                pipe.zrem(self._type_index_key(gpt_type), session_id)
+            deleted = (await pipe.execute())[0]
+        return bool(deleted)
+
+    async def count(self) -> int:
+        # The index may briefly hold sessions whose keys already expired
+        return await self.client.zcount(self._index_key, time.time() - self.ttl_seconds, "+inf")
+
+    async def count_by_type(self) -> Dict[str, int]:
+        gpt_types = sorted(await self.client.smembers(self._types_key))
+        cutoff = time.time() - self.ttl_seconds
+        async with self.client.pipeline(transaction=False) as pipe:
+            for gpt_type in gpt_types:
+                pipe.zcount(self._type_index_key(gpt_type), cutoff, "+inf")
+            counts = await pipe.execute()
+        return {gpt_type: n for gpt_type, n in zip(gpt_types, counts) if n}
+
+    async def scan(self, batch_size: int = 100) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        page = []
+        async for session_id, _ in self.client.zscan_iter(self._index_key, count=batch_size):
+            page.append(session_id)
+            if len(page) >= batch_size:
+                async for item in self._load_many(page):
+                    yield item
+                page = []
+        async for item in self._load_many(page):
+            yield item
+
+    async def _load_many(self, session_ids: list) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        if not session_ids:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for session_id in session_ids:
+                pipe.get(self._meta_key(session_id))
+                pipe.lrange(self._messages_key(session_id), 0, -1)
+            results = await pipe.execute()
+        for index, session_id in enumerate(session_ids):
+            meta, history = results[2 * index], results[2 * index + 1]
+            if meta is not None:
+                yield session_id, self._decode(meta, history)
+
+    async def sweep(self, limit: int) -> int:
+        # The keys expire natively; only the indexes keep entries of expired sessions.
+        # Per-type entries are pruned by score, which a concurrent save always moves past the cutoff
+        cutoff = time.time() - self.ttl_seconds
+        gpt_types = await self.client.smembers(self._types_key)
+        if gpt_types:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for gpt_type in gpt_types:
+                    pipe.zremrangebyscore(self._type_index_key(gpt_type), "-inf", cutoff)
+                await pipe.execute()
+        expired = await self.client.zrangebyscore(self._index_key, "-inf", cutoff, start=0, num=limit)
+        if not expired:
+            return 0
+        async with self.client.pipeline(transaction=False) as pipe:
+            for session_id in expired:
+                pipe.ttl(self._meta_key(session_id))
+            ttls = await pipe.execute()
+        # A session saved since the range query (or scored by a worker whose clock is
+        # behind) is still live: re-score it by its key's TTL so it leaves the expired range
+        now = time.time()
+        gone = [session_id for session_id, ttl in zip(expired, ttls) if ttl == -2]
+        live = {session_id: now - self.ttl_seconds + ttl for session_id, ttl in zip(expired, ttls) if ttl > 0}
+        if gone:
+            await self.client.zrem(self._index_key, *gone)
+            for session_id in gone:
+                self._stored.pop(session_id, None)
+        if live:
+            await self.client.zadd(self._index_key, live, xx=True, gt=True)
+        self.expired_evictions += len(gone)
+        return len(gone)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis",
+            "url": self.url.split("@")[-1],
+            "reads": self.reads,
+            "meta_reads": self.meta_reads,
+            "writes": self.writes,
+            "full_rewrites": self.full_rewrites,
+            "conflicts": self.conflicts,
+            "expired_evictions": self.expired_evictions
+        }
+
+    def _track(self, session_id: str, state: tuple) -> None:
+        self._stored[session_id] = state
+        self._stored.move_to_end(session_id)
+        while len(self._stored) > self.max_tracked:
+            self._stored.popitem(last=False)
+
+
+def _check_version(session_id: str, stored: Optional[Dict[str, Any]], session: Dict[str, Any]) -> None:
+    """Reject saving a copy of a session that is older than the stored one"""
+    if stored is not None and stored is not session and stored.get("version", 0) != session.get("version", 0):
+        raise SessionConflictError(session_id)
+
+
+def create_session_store() -> SessionStore:
+    """Build the session store selected by SESSION_BACKEND"""
+    backend = settings.SESSION_BACKEND
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            settings.SESSION_DB_PATH,
+            max_sessions=settings.SESSION_MAX_COUNT,
+            ttl_seconds=settings.SESSION_TTL_SECONDS,
+            flush_interval=settings.SESSION_FLUSH_INTERVAL_SECONDS
+        )
+    if backend == "redis":
+        return RedisSessionStore(
+            settings.REDIS_URL,
+            prefix=settings.REDIS_KEY_PREFIX,
+            ttl_seconds=settings.SESSION_TTL_SECONDS
+        )
+    if backend != "memory":
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+    return InMemorySessionStore(
+        max_sessions=settings.SESSION_MAX_COUNT,
+        ttl_seconds=settings.SESSION_TTL_SECONDS,
+        memory_limit=int(settings.SESSION_MEMORY_LIMIT_MB * 2**20),
+        spill_dir=settings.SESSION_SPILL_DIR
+    )
@@ -0,0 +1,77 @@
+# Runtime settings, read from the environment (see .env)
+import os
+
+# Upstream (OpenAI) HTTP client, shared by every call: connection pool size, idle
+# keep-alive connections kept, and timeouts (pool = max wait for a free connection)
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "30"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "30"))
+OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "10"))
+OPENAI_POOL_TIMEOUT_SECONDS = float(os.getenv("OPENAI_POOL_TIMEOUT_SECONDS", "10"))
+# Retries of failed upstream calls (429, 5xx, timeouts): attempts in total, jittered
+# exponential backoff bounds, and the longest Retry-After that is waited out
+UPSTREAM_MAX_ATTEMPTS = int(os.getenv("UPSTREAM_MAX_ATTEMPTS", "3"))
+UPSTREAM_BACKOFF_BASE_SECONDS = float(os.getenv("UPSTREAM_BACKOFF_BASE_SECONDS", "0.5"))
+UPSTREAM_BACKOFF_MAX_SECONDS = float(os.getenv("UPSTREAM_BACKOFF_MAX_SECONDS", "8"))
+UPSTREAM_MAX_RETRY_AFTER_SECONDS = float(os.getenv("UPSTREAM_MAX_RETRY_AFTER_SECONDS", "20"))
+# Circuit breaker: consecutive upstream failures before calls fail fast, and seconds until a probe call
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+# Admission control against the OpenAI quota, per model: requests and tokens per minute
+# (0 = take them from the x-ratelimit-* response headers), the longest a call queues for
+# quota before the client gets a 429, and tokens reserved for each call's completion
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "0"))
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "0"))
+UPSTREAM_QUEUE_MAX_WAIT_SECONDS = float(os.getenv("UPSTREAM_QUEUE_MAX_WAIT_SECONDS", "5"))
+UPSTREAM_COMPLETION_TOKEN_RESERVE = int(os.getenv("UPSTREAM_COMPLETION_TOKEN_RESERVE", "500"))
+# Priority scheduling of upstream calls: calls in flight at once (beyond it they queue by
+# priority instead of in the HTTP pool) and how long background calls may queue
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", os.getenv("OPENAI_MAX_CONNECTIONS", "100")))
+UPSTREAM_BACKGROUND_MAX_WAIT_SECONDS = float(os.getenv("UPSTREAM_BACKGROUND_MAX_WAIT_SECONDS", "30"))
+# Latency budget of a chat turn; past it the turn's upstream calls are cancelled and the
+# session is left as it was (0 disables)
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "60"))
+
+# Cache in front of deterministic (temperature=0) completions
+COMPLETION_CACHE_SIZE = int(os.getenv("COMPLETION_CACHE_SIZE", "1024"))
+COMPLETION_CACHE_TTL_SECONDS = float(os.getenv("COMPLETION_CACHE_TTL_SECONDS", "3600"))
+# Directory for on-disk persistence of cached completions; disabled when empty
+COMPLETION_CACHE_DIR = os.getenv("COMPLETION_CACHE_DIR", "")
+
+# Session store limits: least recently used sessions are evicted beyond the cap,
+# and sessions idle for longer than the TTL expire
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "10000"))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", str(24 * 3600)))
+# Memory backend: approximate RAM budget for resident sessions; least recently used
+# sessions beyond it are spilled to compressed files in SESSION_SPILL_DIR (0 disables)
+SESSION_MEMORY_LIMIT_MB = float(os.getenv("SESSION_MEMORY_LIMIT_MB", "0"))
+SESSION_SPILL_DIR = os.getenv("SESSION_SPILL_DIR", "session_spill")
+# Background sweep of expired sessions: seconds between passes and sessions per slice
+SESSION_SWEEP_INTERVAL_SECONDS = float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "60"))
+SESSION_SWEEP_BATCH_SIZE = int(os.getenv("SESSION_SWEEP_BATCH_SIZE", "200"))
+
+# Session backend: "memory" (process-local), "sqlite" (durable, single process)
+# or "redis" (shared by every worker and replica)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")
+# How long the SQLite write-behind queue collects changes before one batched commit
+SESSION_FLUSH_INTERVAL_SECONDS = float(os.getenv("SESSION_FLUSH_INTERVAL_SECONDS", "0.2"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_KEY_PREFIX = os.getenv("REDIS_KEY_PREFIX", "eureka:")
+
+# Readiness (/api/ready) fails, so load balancers shed traffic, when the node is overloaded:
+# requests holding or waiting for a pooled HTTP connection, per connection, p95 latency of recent upstream calls,
+# reply calls queued in the upstream scheduler per concurrency slot, their recent p95 queueing time,
+# or approximate session memory held in process (0 disables that check). Pool saturation is off by
+# default: the scheduler keeps calls beyond UPSTREAM_MAX_CONCURRENCY (by default the pool size) out of
+# the pool, so it stays at or below 1.0 and the queue checks report that overload instead
+READINESS_MAX_POOL_SATURATION = float(os.getenv("READINESS_MAX_POOL_SATURATION", "0"))
+READINESS_MAX_LATENCY_SECONDS = float(os.getenv("READINESS_MAX_LATENCY_SECONDS", "20"))
+READINESS_MAX_QUEUE_DEPTH = float(os.getenv("READINESS_MAX_QUEUE_DEPTH", "1.0"))
+READINESS_MAX_QUEUE_WAIT_SECONDS = float(os.getenv("READINESS_MAX_QUEUE_WAIT_SECONDS", "2"))
+READINESS_MAX_SESSION_MEMORY_MB = float(os.getenv("READINESS_MAX_SESSION_MEMORY_MB", "0"))
+UPSTREAM_LATENCY_WINDOW_SECONDS = float(os.getenv("UPSTREAM_LATENCY_WINDOW_SECONDS", "60"))
+
+# Shared secret for the /api/admin endpoints (X-Admin-Token header); admin endpoints are off when empty
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the work; callers arriving while it is in
+    flight await the same result (or exception) instead of repeating it. The
+    work is cancelled once every caller waiting on it has gone away.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` for ``key`` unless an identical call is already in flight"""
+        call = self._calls.get(key)
+        if call is not None:
+            self.coalesced += 1
+        else:
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+            self._waiters[key] = 0
+            self.executed += 1
+
+            def _forget(done: asyncio.Future) -> None:
+                if self._calls.get(key) is done:
+                    del self._calls[key]
+                    del self._waiters[key]
+
+            call.add_done_callback(_forget)
+
+        self._waiters[key] += 1
+        try:
+            # A caller going away must not cancel the work the others are waiting on
+            return await asyncio.shield(call)
+        except asyncio.CancelledError:
+            if self._calls.get(key) is call:
+                self._waiters[key] -= 1
+                if not self._waiters[key] and not call.done():
+                    self.abandoned += 1
+                    call.cancel()
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        """Execution and coalescing counters"""
+        return {"in_flight": len(self._calls), "executed": self.executed, "coalesced": self.coalesced, "abandoned": self.abandoned}
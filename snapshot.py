@@ -0,0 +1,115 @@
+import json
+import struct
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterator, Tuple
+
+# Session snapshots: MAGIC, then one zlib stream of records. Each record is a
+# 4-byte big-endian length followed by a JSON array [session_id, session]; a
+# zero length marks the end, so truncated uploads are detected.
+MAGIC = b"EKSS\x01"
+MAX_RECORD_BYTES = 64 * 2**20
+# Inflate at most this much per step so a small upload can't expand unbounded in memory
+_INFLATE_STEP = 2**20
+_LENGTH = struct.Struct(">I")
+
+
+class SnapshotError(ValueError):
+    """The snapshot is malformed or truncated"""
+
+
+def serialize_session(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Plain JSON-ready form of a session"""
+    data = dict(session)
+    data["messages"] = list(session["messages"])
+    return data
+
+
+async def encode_snapshot(records: AsyncIterator[Tuple[str, Dict[str, Any]]], level: int = 6) -> AsyncIterator[bytes]:
+    """Encode (session_id, session) pairs as a snapshot, yielding compressed chunks"""
+    deflate = zlib.compressobj(level)
+    yield MAGIC
+    async for session_id, session in records:
+        payload = json.dumps([session_id, serialize_session(session)], ensure_ascii=False).encode("utf-8")
+        chunk = deflate.compress(_LENGTH.pack(len(payload)) + payload)
+        if chunk:
+            yield chunk
+    yield deflate.compress(_LENGTH.pack(0)) + deflate.flush()
+
+
+class SnapshotDecoder:
+    """Incremental snapshot reader: feed it chunks as they arrive"""
+
+    def __init__(self):
+        self._header = b""
+        self._inflate = zlib.decompressobj()
+        self._buffer = bytearray()
+        self.done = False
+
+    def feed(self, chunk: bytes) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield every (session_id, session) record completed by ``chunk``"""
+        if len(self._header) < len(MAGIC):
+            missing = len(MAGIC) - len(self._header)
+            self._header += chunk[:missing]
+            chunk = chunk[missing:]
+            if not MAGIC.startswith(self._header):
+                raise SnapshotError("not a session snapshot")
+        while chunk and not self.done:
+            try:
+                self._buffer += self._inflate.decompress(chunk, _INFLATE_STEP)
+            except zlib.error as e:
+                raise SnapshotError(f"corrupt data: {e}")
+            yield from self._records()
+            chunk = self._inflate.unconsumed_tail
+
+    def close(self) -> None:
+        """Check that the snapshot ended cleanly"""
+        if not self.done:
+            raise SnapshotError("snapshot is truncated")
+
+    def _records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        while len(self._buffer) >= _LENGTH.size and not self.done:
+            (length,) = _LENGTH.unpack_from(self._buffer)
+            if length == 0:
+                self.done = True
+                return
+            if length > MAX_RECORD_BYTES:
+                raise SnapshotError(f"record of {length} bytes exceeds the limit")
+            if len(self._buffer) < _LENGTH.size + length:
+                return
+            payload = bytes(self._buffer[_LENGTH.size:_LENGTH.size + length])
+            del self._buffer[:_LENGTH.size + length]
+            try:
+                session_id, session = json.loads(payload)
+            except (TypeError, ValueError) as e:
+                raise SnapshotError(f"bad record: {e}")
+            _check_record(session_id, session)
+            yield session_id, session
+
+
+def _check_record(session_id: Any, session: Any) -> None:
+    """Reject records that don't have the shape of an exported session"""
+    if not isinstance(session_id, str) or not session_id:
+        raise SnapshotError("bad record: session id must be a non-empty string")
+    if not isinstance(session, dict):
+        raise SnapshotError(f"bad record {session_id}: session must be an object")
+    messages = session.get("messages")
+    if not isinstance(messages, list) or not messages or not all(
+        isinstance(m, dict) and isinstance(m.get("role"), str) and isinstance(m.get("content", 0), (str, type(None)))
+        for m in messages
+    ):
+        raise SnapshotError(f"bad record {session_id}: messages must be a non-empty list of role/content objects")
+    if messages[0]["role"] != "system":
+        raise SnapshotError(f"bad record {session_id}: the first message must be the system prompt")
+    for key, kind, expected in (("gpt_type", str, "a string"), ("fields", dict, "an object"), ("summary", (str, type(None)), "a string or null")):
+        if key in session and not isinstance(session[key], kind):
+            raise SnapshotError(f"bad record {session_id}: {key} must be {expected}")
+    for key in ("fields_version", "history_offset", "version", "current_question"):
+        if key in session and not _is_count(session[key]):
+            raise SnapshotError(f"bad record {session_id}: {key} must be a non-negative integer")
+    usage = session.get("usage")
+    if usage is not None and not (isinstance(usage, dict) and all(_is_count(v) for v in usage.values())):
+        raise SnapshotError(f"bad record {session_id}: usage must be an object of token and call counts")
+
+
+def _is_count(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
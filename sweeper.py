@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+# Support running both as a package and as a standalone script
+try:
+    from .session_store import SessionStore  # type: ignore
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    from session_store import SessionStore  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class SessionSweeper:
+    """Background task that evicts expired sessions from a store.
+
+    Every ``interval`` seconds it runs a pass of small slices (``batch_size``
+    sessions each) and yields to the event loop between slices, so a pass over
+    a large store never blocks request handling.
+    """
+
+    def __init__(self, store: SessionStore, interval: float = 60, batch_size: int = 200):
+        self.store = store
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self.passes = 0
+        self.swept = 0
+        self.last_pass_swept = 0
+        self.last_pass_seconds = 0.0
+        self.last_pass_at: Optional[float] = None
+        self.remaining = 0
+
+    def start(self) -> None:
+        """Start sweeping in the background (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def sweep_once(self) -> int:
+        """Run one full pass; returns the number of sessions evicted"""
+        started = time.monotonic()
+        swept = 0
+        while True:
+            evicted = await self.store.sweep(self.batch_size)
+            swept += evicted
+            self.swept += evicted
+            # A short slice means the backlog is drained; one that evicted
+            # nothing would only find the same entries again
+            if not evicted or evicted < self.batch_size:
+                break
+            # Let requests run between slices
+            await asyncio.sleep(0)
+        self.passes += 1
+        self.last_pass_swept = swept
+        self.last_pass_seconds = time.monotonic() - started
+        self.last_pass_at = time.time()
+        self.remaining = await self.store.count()
+        return swept
+
+    def stats(self) -> Dict[str, Any]:
+        """Sweep counters"""
+        return {
+            "running": bool(self._task and not self._task.done()),
+            "interval_seconds": self.interval,
+            "batch_size": self.batch_size,
+            "passes": self.passes,
+            "swept": self.swept,
+            "last_pass_swept": self.last_pass_swept,
+            "last_pass_seconds": round(self.last_pass_seconds, 4),
+            "last_pass_at": self.last_pass_at,
+            "remaining": self.remaining
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep_once()
+            except Exception as e:
+                logger.warning("Session sweep failed: %s", e)
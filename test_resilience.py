@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the upstream circuit breaker's half-open probe
+"""
+
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+def rate_limit_error():
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, request=request, headers={"retry-after": "0"})
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def half_open_caller():
+    """A caller whose breaker has opened and whose cool-down is over"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "open"
+    return ResilientCaller(breaker, max_attempts=1)
+
+
+def test_rate_limited_probe_lets_next_call_probe():
+    caller = half_open_caller()
+
+    async def throttled():
+        raise rate_limit_error()
+
+    async def ok():
+        return "ok"
+
+    async def run():
+        with pytest.raises(openai.RateLimitError):
+            await caller.call(throttled)
+        assert caller.breaker.state == "half_open"
+        assert caller.breaker.failures == 1
+        return await caller.call(ok)
+
+    assert asyncio.run(run()) == "ok"
+    assert caller.breaker.state == "closed"
+
+
+def test_cancelled_probe_lets_next_call_probe():
+    caller = half_open_caller()
+
+    async def hangs():
+        await asyncio.sleep(3600)
+
+    async def ok():
+        return "ok"
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(caller.call(hangs), 0.01)
+        assert caller.breaker.state == "half_open"
+        return await caller.call(ok)
+
+    assert asyncio.run(run()) == "ok"
+    assert caller.breaker.state == "closed"
+
+
+def test_only_one_probe_at_a_time():
+    caller = half_open_caller()
+
+    async def run():
+        release = asyncio.Event()
+
+        async def probe():
+            await release.wait()
+            return "probe"
+
+        async def ok():
+            return "ok"
+
+        task = asyncio.create_task(caller.call(probe))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            await caller.call(ok)
+        release.set()
+        return await task
+
+    assert asyncio.run(run()) == "probe"
+    assert caller.breaker.state == "closed"
@@ -0,0 +1,45 @@
+from functools import lru_cache
+from typing import Dict, Any, List
+
+# tiktoken is optional; without it token counts fall back to a character heuristic
+try:
+    import tiktoken  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+# Per-message overhead of the chat format (role and separators), per OpenAI's guidance
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+
+@lru_cache(maxsize=16)
+def _get_encoding(model: str):
+    """Return the tiktoken encoding for a model, or None if it can't be loaded"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Encoding files are downloaded on first use and may be unavailable
+        return None
+
+
+def count_text_tokens(text: str, model: str = "gpt-4") -> int:
+    """Count the tokens in a piece of text"""
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        # Roughly four characters per token for English text
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages: List[Dict[str, Any]], model: str = "gpt-4") -> int:
+    """Count the prompt tokens a list of chat messages will use"""
+    total = TOKENS_PER_REPLY
+    for message in messages:
+        total += TOKENS_PER_MESSAGE + count_text_tokens(message.get("content") or "", model)
+    return total
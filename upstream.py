@@ -0,0 +1,180 @@
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+# Support running both as a package and as a standalone script
+try:
+    from . import settings  # type: ignore
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    import settings  # type: ignore
+
+
+class UpstreamMonitor:
+    """In-flight count and recent latency of upstream (OpenAI) calls.
+
+    Latency covers the last ``max_samples`` calls that finished within
+    ``window_seconds``, so an idle node doesn't keep reporting old slowness.
+    """
+
+    def __init__(self, window_seconds: float = 60, max_samples: int = 500):
+        self.window_seconds = window_seconds
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        # (finished_at, duration in seconds) of the most recent calls
+        self._samples: "deque[tuple]" = deque(maxlen=max_samples)
+
+    @asynccontextmanager
+    async def track(self) -> AsyncIterator[None]:
+        """Count a call as in flight and record its duration"""
+        self.in_flight += 1
+        self.calls += 1
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            finished = time.monotonic()
+            self._samples.append((finished, finished - started))
+
+    def recent_latencies(self) -> List[float]:
+        """Durations of the calls that finished within the window"""
+        cutoff = time.monotonic() - self.window_seconds
+        return [duration for finished, duration in self._samples if finished >= cutoff]
+
+    @staticmethod
+    def percentile(values: List[float], percentile: float) -> float:
+        """Percentile (0-100) of ``values``, 0 when empty"""
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+    def stats(self) -> Dict[str, Any]:
+        """Call counters and recent latency"""
+        recent = self.recent_latencies()
+        return {
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "errors": self.errors,
+            "recent_calls": len(recent),
+            "latency_window_seconds": self.window_seconds,
+            "latency_p50_seconds": round(self.percentile(recent, 50), 3),
+            "latency_p95_seconds": round(self.percentile(recent, 95), 3),
+            "latency_max_seconds": round(max(recent, default=0.0), 3)
+        }
+
+
+class PoolMonitor:
+    """Connection use and pool-wait time of the upstream HTTP pool"""
+
+    def __init__(self, max_connections: int, max_samples: int = 500):
+        self.max_connections = max_connections
+        self.waiting = 0
+        self.in_use = 0
+        self.requests = 0
+        self.pool_timeouts = 0
+        self.max_wait = 0.0
+        # Seconds each recent request waited for a connection
+        self._waits: "deque[float]" = deque(maxlen=max_samples)
+
+    def saturation(self) -> float:
+        """Requests holding or waiting for a connection, per pooled connection"""
+        return (self.in_use + self.waiting) / self.max_connections
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool occupancy and wait-time counters"""
+        waits = list(self._waits)
+        return {
+            "max_connections": self.max_connections,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "saturation": round(self.saturation(), 3),
+            "requests": self.requests,
+            "pool_timeouts": self.pool_timeouts,
+            "wait_p50_seconds": round(UpstreamMonitor.percentile(waits, 50), 4),
+            "wait_p95_seconds": round(UpstreamMonitor.percentile(waits, 95), 4),
+            "wait_max_seconds": round(self.max_wait, 4)
+        }
+
+
+class MeteredTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport that reports pool waits and connection use to a PoolMonitor.
+
+    A request has its connection once httpcore starts connecting or sending
+    on it, and gives it back when the response is closed.
+    """
+
+    def __init__(self, monitor: PoolMonitor, **kwargs):
+        super().__init__(**kwargs)
+        self.monitor = monitor
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        monitor = self.monitor
+        started = time.monotonic()
+        state = {"acquired": False, "released": False}
+        chained = request.extensions.get("trace")
+
+        def acquire() -> None:
+            if not state["acquired"]:
+                state["acquired"] = True
+                wait = time.monotonic() - started
+                monitor.waiting -= 1
+                monitor.in_use += 1
+                monitor._waits.append(wait)
+                monitor.max_wait = max(monitor.max_wait, wait)
+
+        def release() -> None:
+            if state["acquired"] and not state["released"]:
+                state["released"] = True
+                monitor.in_use -= 1
+
+        async def trace(name: str, info: Dict[str, Any]) -> None:
+            if name.endswith((".connect_tcp.started", ".send_request_headers.started")):
+                acquire()
+            elif name.endswith(".response_closed.complete"):
+                release()
+            if chained is not None:
+                await chained(name, info)
+
+        request.extensions["trace"] = trace
+        monitor.requests += 1
+        monitor.waiting += 1
+        try:
+            return await super().handle_async_request(request)
+        except httpx.PoolTimeout:
+            monitor.pool_timeouts += 1
+            raise
+        except BaseException:
+            release()
+            raise
+        finally:
+            if not state["acquired"]:
+                monitor.waiting -= 1
+
+
+def create_http_client(monitor: PoolMonitor, on_response: Optional[Callable] = None) -> httpx.AsyncClient:
+    """The shared upstream HTTP client, sized and timed from settings.
+
+    ``on_response`` is an async httpx response hook (e.g. to follow rate-limit headers).
+    """
+    limits = httpx.Limits(
+        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS
+    )
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            settings.OPENAI_TIMEOUT_SECONDS,
+            connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS,
+            pool=settings.OPENAI_POOL_TIMEOUT_SECONDS
+        ),
+        transport=MeteredTransport(monitor, limits=limits),
+        event_hooks={"response": [on_response]} if on_response else None
+    )
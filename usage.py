@@ -0,0 +1,82 @@
+from typing import Dict, Any, List
+
+# Support running both as a package and as a standalone script
+try:
+    from .tokens import count_message_tokens, count_text_tokens  # type: ignore
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    from tokens import count_message_tokens, count_text_tokens  # type: ignore
+
+
+def empty_usage() -> Dict[str, Any]:
+    """A zeroed usage record"""
+    return {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "calls": 0, "estimated_calls": 0}
+
+
+def add_usage(totals: Dict[str, Any], usage: Dict[str, Any]) -> None:
+    """Add one usage record into another"""
+    for key, value in usage.items():
+        totals[key] = totals.get(key, 0) + value
+
+
+def _add(totals: Dict[str, Any], prompt_tokens: int, completion_tokens: int, estimated: bool) -> None:
+    totals["prompt_tokens"] += prompt_tokens
+    totals["completion_tokens"] += completion_tokens
+    totals["total_tokens"] += prompt_tokens + completion_tokens
+    totals["calls"] += 1
+    if estimated:
+        totals["estimated_calls"] += 1
+
+
+class UsageMeter:
+    """Counts prompt and completion tokens per session, per GPT type and per call role.
+
+    Uses the ``usage`` block returned by the API and falls back to the local
+    tokenizer when it is missing (e.g. streamed completions).
+    """
+
+    def __init__(self):
+        self.by_gpt_type: Dict[str, Dict[str, Any]] = {}
+        self.by_role: Dict[str, Dict[str, Any]] = {}
+        self.totals = empty_usage()
+
+    def record_response(self, session: Dict[str, Any], role: str, response, messages: List[Dict[str, Any]], model: str) -> None:
+        """Record usage of a non-streamed completion"""
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.record(session, role, usage.prompt_tokens, usage.completion_tokens, estimated=False)
+            return
+        message = response.choices[0].message if response.choices else None
+        self.record_text(session, role, messages, self._output_text(message), model)
+
+    def record_text(self, session: Dict[str, Any], role: str, messages: List[Dict[str, Any]], output: str, model: str) -> None:
+        """Record usage estimated locally from the prompt messages and output text"""
+        self.record(session, role, count_message_tokens(messages, model), count_text_tokens(output, model), estimated=True)
+
+    def record(self, session: Dict[str, Any], role: str, prompt_tokens: int, completion_tokens: int, estimated: bool = False) -> None:
+        """Add one call to the session, GPT type, role and process totals"""
+        gpt_type = session.get("gpt_type", "offer_clarifier")
+        session_usage = session.setdefault("usage", empty_usage())
+        for totals in (
+            session_usage,
+            self.by_gpt_type.setdefault(gpt_type, empty_usage()),
+            self.by_role.setdefault(role, empty_usage()),
+            self.totals
+        ):
+            _add(totals, prompt_tokens, completion_tokens, estimated)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Process-wide usage totals"""
+        return {
+            "totals": dict(self.totals),
+            "by_gpt_type": {k: dict(v) for k, v in self.by_gpt_type.items()},
+            "by_role": {k: dict(v) for k, v in self.by_role.items()}
+        }
+
+    @staticmethod
+    def _output_text(message) -> str:
+        """Text the model produced, including function-call arguments"""
+        if message is None:
+            return ""
+        if getattr(message, "tool_calls", None):
+            return "".join(call.function.arguments or "" for call in message.tool_calls)
+        return message.content or ""